@@ -0,0 +1,77 @@
+"""Асинхронное чтение справочников (теги и ингредиенты) под ASGI.
+
+Представление проходит те же шаги, что APIView.dispatch вьюсета:
+аутентификация, права, троттлинг, согласование формата, обработка
+ошибок и рендеринг выполняют методы самого вьюсета, данные берутся из
+его queryset, фильтров и сериализатора. Асинхронно выполняется только
+чтение из базы. Прочие методы обслуживает синхронный вьюсет, а рецепты
+и подписки (пагинация, фрагменты, данные пользователя) остаются
+синхронными целиком.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import Http404
+from rest_framework.response import Response
+
+from api.views import IngredientViewSet, TagViewSet
+
+
+async def list_objects(view):
+    objects = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    if isinstance(objects, QuerySet):
+        objects = [obj async for obj in objects]
+    return view.get_serializer(objects, many=True).data
+
+
+async def retrieve_object(view):
+    """Объект как у GenericAPIView.get_object, через async ORM."""
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        obj = await queryset.aget(
+            **{view.lookup_field: view.kwargs[lookup_url_kwarg]}
+        )
+    except (queryset.model.DoesNotExist, TypeError, ValueError):
+        raise Http404(
+            f'No {queryset.model._meta.object_name} matches the given query.'
+        )
+    await sync_to_async(view.check_object_permissions)(view.request, obj)
+    return view.get_serializer(obj).data
+
+
+def read_view(viewset, action, read):
+    """Асинхронный GET действия action вьюсета viewset.
+
+    read — корутина, получающая данные ответа от экземпляра вьюсета.
+    """
+    actions = {'get': action}
+    fallback = viewset.as_view(actions)
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(fallback)(request, *args, **kwargs)
+        instance = viewset(
+            action_map=actions, args=args, kwargs=kwargs,
+            format_kwarg=None,
+        )
+        request = instance.initialize_request(request, *args, **kwargs)
+        instance.request = request
+        instance.headers = instance.default_response_headers
+        try:
+            await sync_to_async(instance.initial)(request, *args, **kwargs)
+            response = Response(await read(instance))
+        except Exception as exc:
+            response = instance.handle_exception(exc)
+        response = instance.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return response.render()
+
+    view.csrf_exempt = True
+    return view
+
+
+tag_list = read_view(TagViewSet, 'list', list_objects)
+tag_detail = read_view(TagViewSet, 'retrieve', retrieve_object)
+ingredient_list = read_view(IngredientViewSet, 'list', list_objects)
+ingredient_detail = read_view(IngredientViewSet, 'retrieve', retrieve_object)
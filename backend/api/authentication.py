@@ -0,0 +1,128 @@
+"""Аутентификация по токену с кэшем токенов.
+
+Соответствие ключа токена и id пользователя кэшируется на
+AUTH_CACHE_TTL секунд в общем кэше AUTH_CACHE_ALIAS, поэтому повторные
+запросы с тем же токеном не ищут его в таблице токенов. Сам
+пользователь в кэш не попадает (в нём хэш пароля) и загружается по
+первичному ключу на каждый запрос, так что деактивация и удаление
+действуют сразу. Запись токена удаляется при выходе (см. api.signals).
+
+Подписанные токены (AUTH_SIGNED_TOKENS) не хранятся в БД вовсе: в них
+записаны id пользователя и отпечаток хэша пароля. Такой токен перестаёт
+действовать после смены пароля, деактивации или истечения срока, но
+не после выхода.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import registry
+
+AUTH_CACHE = registry.counter(
+    'foodgram_auth_cache_total',
+    'Обращения к кэшу аутентификации по токену', ('kind', 'result'),
+)
+
+SIGNED_TOKEN_SALT = 'api.authentication.signed-token'
+SIGNED_TOKEN_KEYWORD = 'Signed'
+
+User = get_user_model()
+
+
+def get_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def token_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def forget_token(key):
+    if settings.AUTH_CACHE_TTL:
+        get_cache().delete(token_cache_key(key))
+
+
+def load_user(user_id):
+    return User.objects.filter(pk=user_id).first()
+
+
+def check_active(user):
+    if user is None or not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return user
+
+
+def token_user(key):
+    """Пользователь по ключу токена DRF."""
+    from rest_framework.authtoken.models import Token
+
+    if not settings.AUTH_CACHE_TTL:
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return check_active(token.user)
+    cache = get_cache()
+    user_id = cache.get(token_cache_key(key))
+    if user_id is not None:
+        AUTH_CACHE.inc(kind='token', result='hit')
+        return check_active(load_user(user_id))
+    AUTH_CACHE.inc(kind='token', result='miss')
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    cache.set(token_cache_key(key), token.user_id, settings.AUTH_CACHE_TTL)
+    return check_active(token.user)
+
+
+def password_fingerprint(user):
+    return user.get_session_auth_hash()[:16]
+
+
+def make_signed_token(user):
+    """Подписанный токен пользователя, не сохраняемый в БД."""
+    return signing.dumps(
+        {'id': user.pk, 'pw': password_fingerprint(user)},
+        salt=SIGNED_TOKEN_SALT,
+    )
+
+
+def signed_token_user(value):
+    """Пользователь по подписанному токену."""
+    try:
+        payload = signing.loads(
+            value, salt=SIGNED_TOKEN_SALT,
+            max_age=settings.AUTH_SIGNED_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    user = check_active(load_user(payload['id']))
+    if payload['pw'] != password_fingerprint(user):
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кэшем токенов."""
+
+    def authenticate_credentials(self, key):
+        return token_user(key), key
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Заголовок Authorization: Signed <токен>, без обращения к БД."""
+
+    keyword = SIGNED_TOKEN_KEYWORD
+
+    def authenticate(self, request):
+        if not settings.AUTH_SIGNED_TOKENS:
+            return None
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        return signed_token_user(key), key
@@ -0,0 +1,161 @@
+"""Пакетное выполнение GET-запросов к API (/api/batch/).
+
+Клиент передаёт список адресов API, пакет проходит аутентификацию и
+middleware один раз, а подзапросы вызывают представления напрямую с
+уже определённым пользователем. Ответы DRF попадают в общий ответ
+данными, без промежуточного рендеринга. При BATCH_CONCURRENCY > 1
+подзапросы выполняются в пуле потоков, каждый в своём соединении с БД.
+
+При сбросе нагрузки (core.shedding) пакет классифицируется по худшему
+приоритету подзапросов и целиком получает 503, если этот класс сейчас
+не допускается; каждый подзапрос занимает место в пределе под своим
+приоритетом, а отклонённый возвращается в пакете со статусом 503.
+"""
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from core.constants import BATCH_SIZE_BUCKETS
+from core.metrics import registry
+from core.shedding import (SHED_DETAIL, SHED_REQUESTS, limited,
+                           process_limiter, request_priority, shed,
+                           worst_priority)
+
+try:
+    import orjson as json
+except ImportError:
+    import json
+
+logger = logging.getLogger('foodgram.requests')
+
+BATCH_SIZE = registry.histogram(
+    'foodgram_batch_requests',
+    'Число подзапросов в пакетном запросе',
+    buckets=BATCH_SIZE_BUCKETS,
+)
+
+
+class Overloaded(APIException):
+    """Предел процесса не допускает худший класс подзапросов пакета."""
+
+    status_code = 503
+    default_detail = SHED_DETAIL
+
+    def __init__(self, priority):
+        super().__init__()
+        self.wait = settings.LOAD_SHEDDING_RETRY_AFTER[priority]
+
+
+def split_url(url):
+    """Путь и строка запроса адреса, абсолютного или от корня сайта."""
+    parts = urlsplit(url)
+    return parts.path, parts.query
+
+
+def subrequest(request, url):
+    """GET-запрос к url от имени пользователя пакетного запроса."""
+    path, query = split_url(url)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE')
+    }
+    sub.META.update(
+        REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query
+    )
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    try:
+        sub.resolver_match = resolve(path)
+    except Resolver404:
+        pass
+    sub.user = request.user
+    if request.user.is_authenticated:
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def content(response):
+    """Тело ответа подзапроса: данные DRF, разобранный JSON или текст."""
+    if isinstance(response, Response):
+        return response.data
+    if not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset, errors='replace')
+
+
+def perform(sub):
+    """Выполняет подзапрос и возвращает {'status', 'body'}."""
+    match = sub.resolver_match
+    if match is None:
+        return {'status': 404, 'body': {'detail': 'Not found.'}}
+    view = match.func
+
+    def call():
+        if asyncio.iscoroutinefunction(view):
+            return async_to_sync(view)(sub, *match.args, **match.kwargs)
+        return view(sub, *match.args, **match.kwargs)
+
+    priority = (
+        request_priority(sub) if settings.LOAD_SHEDDING_ENABLED else None
+    )
+    try:
+        if priority is None:
+            response = call()
+        else:
+            response = limited(priority, call)
+            if response is None:
+                response = shed(priority)
+        return {'status': response.status_code, 'body': content(response)}
+    except Exception:
+        logger.exception(
+            'Подзапрос %s пакета завершился ошибкой', sub.get_full_path()
+        )
+        return {'status': 500, 'body': {'detail': 'Server error.'}}
+
+
+def perform_isolated(sub):
+    """Подзапрос в потоке пула, соединения закрываются после него."""
+    try:
+        return perform(sub)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, urls):
+    """Ответы на подзапросы в порядке адресов."""
+    BATCH_SIZE.observe(len(urls))
+    subs = [subrequest(request, url) for url in urls]
+    if settings.LOAD_SHEDDING_ENABLED:
+        priority = worst_priority(request_priority(sub) for sub in subs)
+        if priority is not None and not process_limiter().admits(priority):
+            SHED_REQUESTS.inc(priority=priority)
+            raise Overloaded(priority)
+    workers = min(settings.BATCH_CONCURRENCY, len(subs))
+    if workers <= 1:
+        return [perform(sub) for sub in subs]
+    with ThreadPoolExecutor(workers) as executor:
+        # Контекст (чтение с реплик, замеры запроса) копируется для
+        # каждого подзапроса: один контекст нельзя войти из двух потоков.
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run, perform_isolated, sub
+            )
+            for sub in subs
+        ]
+        return [future.result() for future in futures]
@@ -1,8 +1,9 @@
 from django_filters import ModelMultipleChoiceFilter
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 
 from recipes.models import Recipe, Tag, User
+from recipes.search import search_ingredients
 
 
 class RecipeFilter(FilterSet):
@@ -37,5 +38,25 @@ class RecipeFilter(FilterSet):
         )
 
 
-class IngredientFilter(SearchFilter):
+class IngredientFilter(BaseFilterBackend):
+    """Поиск ингредиентов по началу, части названия и с опечатками
+    (recipes.search); без параметра name — все ингредиенты."""
+
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term or getattr(view, 'action', 'list') != 'list':
+            return queryset
+        return search_ingredients(queryset, term)
+
+
+class UserSearchFilter(SearchFilter):
+    """Поиск пользователей ?search= по вхождению в никнейм, имя или
+    фамилию. В PostgreSQL его обслуживает триграммный индекс
+    (users, миграция 0005)."""
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', 'list') != 'list':
+            return queryset
+        return super().filter_queryset(request, queryset, view)
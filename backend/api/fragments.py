@@ -0,0 +1,156 @@
+"""Готовые JSON-фрагменты рецептов для списков.
+
+Фрагмент — не зависящая от пользователя часть представления рецепта
+(RecipeFragmentSerializer). Фрагменты лежат в двухуровневом кэше
+(core.cache) с тегами рецепта, автора, справочников и схемы и
+устаревают вместе с ними. Список рецептов собирается из фрагментов и
+признаков текущего пользователя, сериализаторы работают только для
+рецептов, которых нет в кэше. Команда rebuild_recipe_fragments
+сбрасывает все фрагменты после изменения схемы и заполняет кэш заново.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from api.serializers import (AuthorFragmentSerializer, GetRecipeSerializer,
+                             RecipeFragmentSerializer, UserSerializer)
+from core.cache import tagged_cache
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Follow
+
+SCHEMA_TAG = 'recipe-fragments'
+RECIPE_FIELDS = GetRecipeSerializer.Meta.fields
+AUTHOR_FIELDS = UserSerializer.Meta.fields
+SCHEMA = hashlib.md5(repr((
+    RecipeFragmentSerializer.Meta.fields,
+    AuthorFragmentSerializer.Meta.fields,
+)).encode()).hexdigest()[:8]
+
+
+def fragment_key(recipe_id, base_url):
+    """Ключ зависит от набора полей, поэтому новые поля не требуют
+    ручного сброса; прочие изменения схемы сбрасывает команда."""
+    site = hashlib.md5(base_url.encode()).hexdigest()[:8]
+    return f'recipe-fragment:{SCHEMA}:{site}:{recipe_id}'
+
+
+def fragment_tags(recipe_id, author_id):
+    return (
+        SCHEMA_TAG, f'recipe:{recipe_id}', f'user:{author_id}',
+        'tags', 'ingredients',
+    )
+
+
+def fragment_queryset():
+    return Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'ingredient',
+            queryset=RecipeIngredient.objects.select_related('ingredient'),
+        ),
+    )
+
+
+def build_fragments(recipes, request):
+    """Строит и кэширует фрагменты рецептов [(id, author_id), ...]."""
+    base_url = request.build_absolute_uri('/')
+    tags = {
+        recipe_id: fragment_tags(recipe_id, author_id)
+        for recipe_id, author_id in recipes
+    }
+    versions = tagged_cache.tag_versions(
+        {tag for recipe_tags in tags.values() for tag in recipe_tags}
+    )
+    found = list(fragment_queryset().filter(pk__in=tags))
+    context = {'request': request}
+    # Все промахи сериализуются одним проходом, а автор нескольких
+    # рецептов страницы — один раз.
+    serializer = RecipeFragmentSerializer(found, many=True, context=context)
+    serializer.child.fields.pop('author')
+    authors = {recipe.author_id: recipe.author for recipe in found}
+    authors = dict(zip(authors, AuthorFragmentSerializer(
+        authors.values(), many=True, context=context
+    ).data))
+    fragments = {}
+    for recipe, fragment in zip(found, serializer.data):
+        fragment['author'] = authors[recipe.author_id]
+        fragments[recipe.pk] = fragment
+    tagged_cache.store_many(
+        {
+            fragment_key(recipe_id, base_url): (fragment, tags[recipe_id])
+            for recipe_id, fragment in fragments.items()
+        },
+        versions, settings.RECIPE_FRAGMENT_TIMEOUT,
+    )
+    return fragments
+
+
+def get_fragments(recipes, request):
+    """Фрагменты рецептов [(id, author_id), ...] по id."""
+    base_url = request.build_absolute_uri('/')
+    keys = {
+        fragment_key(recipe_id, base_url): recipe_id
+        for recipe_id, _ in recipes
+    }
+    fragments = {
+        keys[key]: fragment
+        for key, fragment in tagged_cache.get_many(keys).items()
+    }
+    missing = [recipe for recipe in recipes if recipe[0] not in fragments]
+    if missing:
+        fragments.update(build_fragments(missing, request))
+    return fragments
+
+
+def user_flags(user, recipes):
+    """Избранное, корзина и подписки пользователя для страницы."""
+    if not user.is_authenticated:
+        return set(), set(), set()
+    recipe_ids = [recipe_id for recipe_id, _ in recipes]
+    author_ids = {author_id for _, author_id in recipes}
+    return (
+        set(Favorite.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)),
+        set(ShoppingCart.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)),
+        set(Follow.objects.filter(
+            user=user, following_id__in=author_ids
+        ).values_list('following_id', flat=True)),
+    )
+
+
+def render_recipes(recipes, request, fields=RECIPE_FIELDS):
+    """Представления рецептов [(id, author_id), ...] в порядке списка.
+
+    Совпадают с GetRecipeSerializer, ограниченным полями fields.
+    """
+    fragments = get_fragments(recipes, request)
+    favorited, in_cart, subscribed = user_flags(request.user, recipes)
+    fields = [name for name in RECIPE_FIELDS if name in fields]
+    results = []
+    for recipe_id, author_id in recipes:
+        fragment = fragments.get(recipe_id)
+        if fragment is None:
+            continue
+        item = {}
+        for name in fields:
+            if name == 'is_favorited':
+                item[name] = recipe_id in favorited
+            elif name == 'is_in_shopping_cart':
+                item[name] = recipe_id in in_cart
+            elif name == 'author':
+                author = fragment['author']
+                item[name] = {
+                    key: (
+                        author_id in subscribed if key == 'is_subscribed'
+                        else author[key]
+                    )
+                    for key in AUTHOR_FIELDS
+                }
+            else:
+                item[name] = fragment[name]
+        results.append(item)
+    return results
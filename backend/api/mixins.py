@@ -1,3 +1,12 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+from core.instrumentation import track
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
 class CurrentRecipeMixin:
 
     def get_current_recipe(self, obj, model) -> bool:
@@ -11,3 +20,78 @@ class CurrentRecipeMixin:
             user=user,
             recipe=obj
         ).exists()
+
+
+class TimedRepresentationMixin:
+    """Учитывает время сериализации в статистике запроса."""
+
+    def to_representation(self, instance):
+        with track('serializer'):
+            return super().to_representation(instance)
+
+
+def parse_fieldset(request, available):
+    """Поля ответа по параметрам ?fields= и ?omit= через запятую.
+
+    Возвращает None, если параметры не заданы.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = request.GET.get(FIELDS_PARAM)
+    omit = request.GET.get(OMIT_PARAM)
+    if fields is None and omit is None:
+        return None
+    selected = set(available)
+    errors = {}
+    for param, value in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+        if value is None:
+            continue
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - set(available)
+        if unknown:
+            errors[param] = [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}'
+            ]
+        if param == FIELDS_PARAM:
+            selected &= names
+        else:
+            selected -= names
+    if errors:
+        raise ValidationError(errors)
+    return selected
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля из ?fields= и без полей из ?omit=.
+
+    Действует только на сериализатор верхнего уровня (или элемент
+    списка верхнего уровня), вложенные сериализаторы не меняются.
+    """
+
+    sparse = True
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        if parent is not None or not self.sparse:
+            return fields
+        selected = parse_fieldset(self.context.get('request'), fields)
+        if selected is None:
+            return fields
+        return {
+            name: field for name, field in fields.items()
+            if name in selected
+        }
+
+
+class SparseFieldsViewMixin:
+    """Набор запрошенных полей для подготовки queryset вьюсета."""
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            available = self.get_serializer_class().Meta.fields
+            selected = parse_fieldset(self.request, available)
+            self._fieldset = set(available) if selected is None else selected
+        return self._fieldset
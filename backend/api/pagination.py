@@ -1,8 +1,138 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import partial
 
+from django.core.paginator import EmptyPage, Paginator
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import (CursorPagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+
+from core import counts
 from foodgram.constants import PAGE_PAGINATION_SIZE
 
 
+def view_count_tags(view):
+    """Теги кэша числа строк от представления (get_count_tags)."""
+    get_count_tags = getattr(view, 'get_count_tags', None)
+    return get_count_tags() if get_count_tags is not None else None
+
+
+class CountPaginator(Paginator):
+    """Paginator с числом строк из core.counts: оценка планировщика или
+    кэшированный точный COUNT.
+
+    При оценке номера страниц дальше оценки допустимы, страница
+    выбирается с лишней строкой и уточняет число (counts.settle).
+    """
+
+    def __init__(self, object_list, per_page, count_tags=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_tags = count_tags
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = counts.count(
+            self.object_list, self.count_tags
+        )
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_exact or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        self.count, self.count_exact = counts.settle(
+            self.count, False, bottom, len(rows), self.per_page
+        )
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows[:self.per_page], number, self)
+
+
 class LimitPagination(PageNumberPagination):
     page_size = PAGE_PAGINATION_SIZE
     page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(
+            CountPaginator, count_tags=view_count_tags(view)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_exact': self.page.paginator.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class KeysetPagination(CursorPagination):
+    """Страницы по возрастанию id без COUNT и OFFSET."""
+
+    page_size = PAGE_PAGINATION_SIZE
+    page_size_query_param = 'limit'
+    ordering = 'id'
+
+
+class LimitOrCursorPagination(LimitOffsetPagination):
+    """limit/offset, а при параметре cursor (для первой страницы —
+    пустом) — KeysetPagination: ответ без count, ссылки next и previous
+    ведут по ключу.
+
+    Число строк в режиме limit/offset берётся из core.counts, как в
+    LimitPagination.
+    """
+
+    cursor_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        if self.cursor_class.cursor_query_param in request.query_params:
+            self.cursor = self.cursor_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count, self.count_exact = counts.count(
+            queryset, view_count_tags(view)
+        )
+        if self.count_exact:
+            if self.count == 0 or self.offset > self.count:
+                rows = []
+            else:
+                rows = list(queryset[self.offset:self.offset + self.limit])
+        else:
+            rows = list(queryset[self.offset:self.offset + self.limit + 1])
+            self.count, self.count_exact = counts.settle(
+                self.count, False, self.offset, len(rows), self.limit
+            )
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        return rows[:self.limit]
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'count_exact': self.count_exact,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
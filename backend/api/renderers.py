@@ -0,0 +1,90 @@
+"""JSON-рендерер и парсер на orjson.
+
+Вывод соответствует JSONRenderer DRF в настройках по умолчанию
+(UNICODE_JSON, COMPACT_JSON): UTF-8 без экранирования и без пробелов.
+Даты и время (OPT_PASSTHROUGH_DATETIME), Decimal, ленивые строки и
+прочие типы, которых нет в JSON, передаются кодировщику DRF, поэтому
+записываются так же; dataclass тоже уходит в DRF (и, как там, не
+сериализуется). Ключи-числа, True и None становятся строками, как в
+json. Отличия от DRF:
+
+- float пишется кратчайшей записью orjson: 1e16 и 1e-7 вместо 1e+16 и
+  1e-07 (значение то же);
+- NaN и бесконечность записываются как null, а DRF со STRICT_JSON
+  отказывается их сериализовать;
+- ключи-даты и другие нестроковые ключи, которые json не принимает,
+  orjson сериализует.
+
+Без orjson, с отступами или при ошибке orjson работает стандартная
+реализация DRF.
+"""
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+LINE_SEPARATORS = (
+    (b'\xe2\x80\xa8', b'\\u2028'),
+    (b'\xe2\x80\xa9', b'\\u2029'),
+)
+
+encoder = encoders.JSONEncoder()
+
+
+def dumps(data):
+    """Сериализует данные ответа в байты JSON."""
+    content = orjson.dumps(
+        data, default=encoder.default, option=OPTIONS
+    )
+    for separator, escaped in LINE_SEPARATORS:
+        if separator in content:
+            content = content.replace(separator, escaped)
+    return content
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            return dumps(data)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        content = stream.read() if stream is not None else b''
+        if encoding.lower().replace('-', '') != 'utf8':
+            content = content.decode(encoding).encode()
+        try:
+            return orjson.loads(content)
+        except (orjson.JSONDecodeError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,3 +1,5 @@
+from urllib.parse import urlsplit
+
 from django.contrib.auth import get_user_model
 from djoser.serializers import PasswordSerializer
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
@@ -5,8 +7,9 @@ from djoser.serializers import UserSerializer as BaseUserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
-from api.mixins import CurrentRecipeMixin
-from foodgram.constants import MIN_INGREDIENT_AMOUNT
+from api.mixins import (CurrentRecipeMixin, SparseFieldsMixin,
+                        TimedRepresentationMixin)
+from foodgram.constants import BATCH_MAX_REQUESTS, MIN_INGREDIENT_AMOUNT
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                             ShoppingCart, Tag)
 from users.models import Follow
@@ -33,7 +36,9 @@ class UserCreateSerializer(BaseUserCreateSerializer):
         return serializer.data
 
 
-class UserSerializer(BaseUserSerializer):
+class UserSerializer(
+        SparseFieldsMixin, TimedRepresentationMixin, BaseUserSerializer
+):
     """Сериализатор данных пользователя."""
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -47,6 +52,9 @@ class UserSerializer(BaseUserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        annotated = getattr(obj, 'is_subscribed', None)
+        if annotated is not None:
+            return annotated
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Follow.objects.filter(
@@ -86,7 +94,7 @@ class PasswordChangeSerializer(PasswordSerializer):
         return user
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Сериализатор данных для тегов."""
 
     class Meta:
@@ -94,7 +102,9 @@ class TagSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+        TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор данных для ингредиентов."""
 
     class Meta:
@@ -132,7 +142,10 @@ class CreateIngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class GetRecipeSerializer(serializers.ModelSerializer, CurrentRecipeMixin):
+class GetRecipeSerializer(
+        SparseFieldsMixin, TimedRepresentationMixin,
+        serializers.ModelSerializer, CurrentRecipeMixin,
+):
     """Сериализатор данных для получения информации о рецептах."""
 
     tags = TagSerializer(
@@ -158,13 +171,49 @@ class GetRecipeSerializer(serializers.ModelSerializer, CurrentRecipeMixin):
         )
 
     def get_is_favorited(self, obj):
+        annotated = getattr(obj, 'is_favorited', None)
+        if annotated is not None:
+            return annotated
         return self.get_current_recipe(obj, Favorite)
 
     def get_is_in_shopping_cart(self, obj):
+        annotated = getattr(obj, 'is_in_shopping_cart', None)
+        if annotated is not None:
+            return annotated
         return self.get_current_recipe(obj, ShoppingCart)
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class AuthorFragmentSerializer(UserSerializer):
+    """Автор рецепта без признака подписки текущего пользователя."""
+
+    sparse = False
+    is_subscribed = None
+
+    class Meta(UserSerializer.Meta):
+        fields = tuple(
+            name for name in UserSerializer.Meta.fields
+            if name != 'is_subscribed'
+        )
+
+
+class RecipeFragmentSerializer(GetRecipeSerializer):
+    """Не зависящая от пользователя часть ответа о рецепте."""
+
+    sparse = False
+    author = AuthorFragmentSerializer(read_only=True)
+    is_favorited = None
+    is_in_shopping_cart = None
+
+    class Meta(GetRecipeSerializer.Meta):
+        fields = tuple(
+            name for name in GetRecipeSerializer.Meta.fields
+            if name not in ('is_favorited', 'is_in_shopping_cart')
+        )
+
+
+class ShortRecipeSerializer(
+        TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор данных для получения краткой информации о рецепте."""
 
     class Meta:
@@ -336,7 +385,9 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return data
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(
+        TimedRepresentationMixin, serializers.ModelSerializer
+):
     """Сериализатор данных для подписки."""
 
     email = serializers.ReadOnlyField(source='following.email')
@@ -373,4 +424,30 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return ShortRecipeSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
+        annotated = getattr(obj, 'recipes_count', None)
+        if annotated is not None:
+            return annotated
         return obj.following.recipes.count()
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Сериализатор подзапроса пакетного запроса."""
+
+    method = serializers.ChoiceField(choices=('GET',), default='GET')
+    url = serializers.CharField()
+
+    def validate_url(self, value):
+        path = urlsplit(value).path
+        if not path.startswith('/api/') or path.startswith('/api/batch/'):
+            raise serializers.ValidationError(
+                'Допустимы только адреса API, кроме /api/batch/'
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор пакетного запроса."""
+
+    requests = BatchItemSerializer(
+        many=True, allow_empty=False, max_length=BATCH_MAX_REQUESTS
+    )
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+# Модель токена указана строкой, а кэш аутентификации импортируется
+# в обработчиках: запуск приложения не загружает DRF.
+@receiver(post_delete, sender='authtoken.Token')
+def forget_deleted_token(sender, instance, **kwargs):
+    """Выход (djoser token/logout) удаляет токен: убираем его из кэша."""
+    from api.authentication import forget_token
+
+    forget_token(instance.key)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from foodgram.constants import BATCH_MAX_REQUESTS
+from recipes.models import Tag
+
+
+class BatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def batch(self, *urls):
+        return self.client.post('/api/batch/', {
+            'requests': [{'url': url} for url in urls]
+        }, format='json')
+
+    def test_subrequests_are_answered_in_order(self):
+        response = self.batch(
+            f'/api/tags/{self.tag.pk}/', '/api/tags/', '/api/missing/',
+        )
+        self.assertEqual(response.status_code, 200)
+        tag = {'id': self.tag.pk, 'name': 'Завтрак', 'slug': 'breakfast'}
+        self.assertEqual(response.json(), [
+            {'status': 200, 'body': tag},
+            {'status': 200, 'body': [tag]},
+            {'status': 404, 'body': {'detail': 'Not found.'}},
+        ])
+
+    def test_subrequest_errors_do_not_fail_batch(self):
+        response = self.batch('/api/users/me/', '/api/tags/0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['status'] for item in response.json()], [401, 404]
+        )
+
+    def test_request_count_is_limited(self):
+        response = self.batch(*['/api/tags/'] * BATCH_MAX_REQUESTS)
+        self.assertEqual(response.status_code, 200)
+        response = self.batch(*['/api/tags/'] * (BATCH_MAX_REQUESTS + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('requests', response.json())
+
+    def test_empty_batch_is_rejected(self):
+        self.assertEqual(self.batch().status_code, 400)
+
+    def test_only_api_urls_are_allowed(self):
+        for url in ('/admin/', '/api/batch/', 'https://example.com/x'):
+            with self.subTest(url=url):
+                self.assertEqual(self.batch(url).status_code, 400)
+
+    def test_only_get_subrequests_are_allowed(self):
+        response = self.client.post('/api/batch/', {'requests': [
+            {'method': 'POST', 'url': '/api/tags/'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(LOAD_SHEDDING_ENABLED=True)
+    def test_overloaded_batch_is_shed_as_a_whole(self):
+        with mock.patch('api.batch.process_limiter') as limiter:
+            limiter.return_value.admits.return_value = False
+            response = self.batch('/api/tags/', '/api/recipes/')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        limiter.return_value.admits.assert_called_once_with('normal')
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+class SparseFieldsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Рецептов', password='password',
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Омлет', text='Взбить и пожарить',
+            cooking_time=10,
+        )
+        cls.recipe.tags.add(
+            Tag.objects.create(name='Завтрак', slug='breakfast')
+        )
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, amount=2,
+            ingredient=Ingredient.objects.create(
+                name='яйца', measurement_unit='шт'
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_fields_keeps_only_requested(self):
+        data = self.get('/api/recipes/?fields=id,name')
+        self.assertEqual(
+            data['results'], [{'id': self.recipe.pk, 'name': 'Омлет'}]
+        )
+
+    def test_omit_drops_fields(self):
+        recipe = self.get(
+            f'/api/recipes/{self.recipe.pk}/?omit=author,ingredients,text'
+        )
+        self.assertEqual(set(recipe), {
+            'id', 'tags', 'is_favorited', 'is_in_shopping_cart', 'name',
+            'image', 'cooking_time',
+        })
+
+    def test_nested_serializers_are_not_trimmed(self):
+        recipe = self.get(f'/api/recipes/{self.recipe.pk}/?fields=tags')
+        self.assertEqual(recipe, {'tags': [
+            {'id': self.recipe.tags.get().pk, 'name': 'Завтрак',
+             'slug': 'breakfast'},
+        ]})
+
+    def test_without_params_all_fields_are_returned(self):
+        recipe = self.get(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(recipe['ingredients'][0]['amount'], 2)
+        self.assertEqual(recipe['author']['username'], 'author')
+
+    def test_user_fields(self):
+        data = self.get('/api/users/?fields=id,username')
+        self.assertEqual(
+            data['results'], [{'id': self.author.pk, 'username': 'author'}]
+        )
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/recipes/?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
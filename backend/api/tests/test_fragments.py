@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import fragments
+from core.cache import tagged_cache
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+
+@override_settings(RECIPE_FRAGMENTS=True)
+class RecipeFragmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        ingredient = Ingredient.objects.create(
+            name='яйца', measurement_unit='шт'
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='secret',
+            )
+            for number in range(2)
+        ]
+        for number in range(6):
+            recipe = Recipe.objects.create(
+                author=authors[number % 2], name=f'Рецепт {number}',
+                text='Текст', cooking_time=10,
+            )
+            recipe.tags.add(tag)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=number + 1
+            )
+
+    def setUp(self):
+        cache.clear()
+        tagged_cache.local.clear()
+        self.client = APIClient()
+
+    def get(self, path='/api/recipes/'):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_misses_are_built_in_one_batch(self):
+        with mock.patch.object(
+            tagged_cache, 'store_many', wraps=tagged_cache.store_many
+        ) as store_many, mock.patch.object(
+            fragments, 'build_fragments', wraps=fragments.build_fragments
+        ) as build:
+            self.get()
+        build.assert_called_once()
+        self.assertEqual(len(build.call_args.args[0]), 6)
+        store_many.assert_called_once()
+        self.assertEqual(len(store_many.call_args.args[0]), 6)
+
+    def test_cached_fragments_skip_serialization(self):
+        cold = self.get()
+        with mock.patch.object(fragments, 'build_fragments') as build:
+            warm = self.get()
+        build.assert_not_called()
+        self.assertEqual(cold, warm)
+
+    def test_fragments_match_serializer(self):
+        fragments_results = self.get()
+        with override_settings(RECIPE_FRAGMENTS=False):
+            self.assertEqual(fragments_results, self.get())
+
+    def test_only_missing_fragments_are_built(self):
+        self.get('/api/recipes/?limit=2')
+        with mock.patch.object(
+            fragments, 'build_fragments', wraps=fragments.build_fragments
+        ) as build:
+            self.get()
+        self.assertEqual(len(build.call_args.args[0]), 4)
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Follow, User
+
+
+class SubscriptionsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='secret',
+        )
+        cls.authors = []
+        for number in range(3):
+            author = User.objects.create_user(
+                username=f'author{number}',
+                email=f'author{number}@example.com', password='secret',
+            )
+            Recipe.objects.bulk_create(
+                Recipe(
+                    author=author, name=f'Рецепт {index}', text='Текст',
+                    cooking_time=10,
+                )
+                for index in range(number + 1)
+            )
+            Follow.objects.create(user=cls.reader, following=author)
+            cls.authors.append(author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def subscriptions(self):
+        response = self.client.get('/api/users/subscriptions/')
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['username']: item['recipes_count']
+            for item in response.json()['results']
+        }
+
+    def test_recipes_count(self):
+        self.assertEqual(
+            self.subscriptions(), {'author0': 1, 'author1': 2, 'author2': 3}
+        )
+
+    def test_deleted_recipes_are_not_counted(self):
+        Recipe.objects.filter(author=self.authors[2]).first().delete()
+        self.assertEqual(self.subscriptions()['author2'], 2)
+
+    def test_recipes_are_not_counted_per_author(self):
+        count = f'SELECT COUNT(*) AS "__count" FROM "{Recipe._meta.db_table}"'
+        with CaptureQueriesContext(connection) as queries:
+            self.subscriptions()
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith(count)
+        ])
+
+    def test_subscribe_response_counts_recipes(self):
+        author = User.objects.create_user(
+            username='new', email='new@example.com', password='secret',
+        )
+        Recipe.objects.create(
+            author=author, name='Рецепт', text='Текст', cooking_time=5,
+        )
+        response = self.client.post(f'/api/users/{author.pk}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['recipes_count'], 1)
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
+                       UserViewSet, batch, signed_token)
+from core.views import metrics
 
 app_name = 'api'
 router = DefaultRouter()
@@ -11,7 +14,30 @@ router.register(r'ingredients', IngredientViewSet, basename='ingredients')
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 
 urlpatterns = [
+    path('_metrics', metrics, name='metrics'),
+    path('batch/', batch, name='batch'),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.AUTH_SIGNED_TOKENS:
+    urlpatterns.insert(
+        0, path('auth/token/signed/', signed_token, name='signed_token')
+    )
+
+if settings.ASYNC_READ_API:
+    from api import async_views
+
+    urlpatterns = [
+        path('tags/', async_views.tag_list, name='tags-list'),
+        path('tags/<int:pk>/', async_views.tag_detail, name='tags-detail'),
+        path(
+            'ingredients/', async_views.ingredient_list,
+            name='ingredients-list'
+        ),
+        path(
+            'ingredients/<int:pk>/', async_views.ingredient_detail,
+            name='ingredients-detail'
+        ),
+    ] + urlpatterns
@@ -1,47 +1,79 @@
 import hashlib
 
-from django.db.models import Sum
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Sum
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet as BaseUserViewSet
 from rest_framework import status
-from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import LimitPagination
+from api.authentication import SIGNED_TOKEN_KEYWORD, make_signed_token
+from api.batch import run_batch
+from api.filters import IngredientFilter, RecipeFilter, UserSearchFilter
+from api.fragments import render_recipes
+from api.mixins import SparseFieldsViewMixin
+from api.pagination import LimitOrCursorPagination, LimitPagination
 from api.permissions import IsAuthorOrRead
-from api.serializers import (CreateRecipeSerializer, FavoriteSerializer,
-                             GetRecipeSerializer, IngredientSerializer,
-                             PasswordChangeSerializer, ShoppingCartSerializer,
+from api.serializers import (BatchSerializer, CreateRecipeSerializer,
+                             FavoriteSerializer, GetRecipeSerializer,
+                             IngredientSerializer, PasswordChangeSerializer,
+                             ShoppingCartSerializer, ShortRecipeSerializer,
                              SubscriptionSerializer, TagSerializer, User,
                              UserCreateSerializer, UserSerializer)
+from foodgram.constants import SIMILAR_RECIPES_LIMIT
 from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag)
+                            RecipeNeighbour, ShoppingCart, Tag)
 from users.models import Follow
 
 
-class UserViewSet(BaseUserViewSet):
+def annotate_subscribed(queryset, user):
+    """Признак подписки текущего пользователя одним подзапросом."""
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(is_subscribed=Exists(
+        Follow.objects.filter(user=user, following=OuterRef('pk'))
+    ))
+
+
+class UserViewSet(SparseFieldsViewMixin, BaseUserViewSet):
     """Вьюсет для пользователей."""
 
-    queryset = User.objects.all()
-    pagination_class = LimitOffsetPagination
+    queryset = User.objects.order_by('id')
+    pagination_class = LimitOrCursorPagination
+    filter_backends = (UserSearchFilter,)
+    search_fields = ('username', 'first_name', 'last_name')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return UserCreateSerializer
         return UserSerializer
 
+    def get_count_tags(self):
+        """Теги кэша числа строк в списках (core.counts)."""
+        if self.action == 'subscriptions':
+            # users: удаление автора скрывает подписки на него.
+            return [f'user:{self.request.user.pk}', 'users']
+        return ['users']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET' and (
+                'is_subscribed' in self.get_fieldset()
+        ):
+            queryset = annotate_subscribed(queryset, self.request.user)
+        return queryset
+
     @action(
         detail=False, methods=['get'],
         permission_classes=[IsAuthenticated]
     )
     def me(self, request):
-        user = request.user
-        serializer = UserSerializer(user)
+        user = self.get_queryset().get(pk=request.user.pk)
+        serializer = UserSerializer(user, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(
@@ -92,7 +124,12 @@ class UserViewSet(BaseUserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        subs_list = user.follower.all()
+        subs_list = user.follower.filter(
+            following__deleted_at__isnull=True
+        ).select_related('following').annotate(recipes_count=Count(
+            'following__recipes',
+            filter=Q(following__recipes__deleted_at__isnull=True),
+        )).order_by('id')
         serializer = SubscriptionSerializer(
             self.paginate_queryset(subs_list),
             many=True,
@@ -173,10 +210,9 @@ class IngredientViewSet(ModelViewSet):
     http_method_names = ['get']
     permission_classes = (AllowAny,)
     filter_backends = (IngredientFilter,)
-    search_fields = ('^name',)
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(SparseFieldsViewMixin, ModelViewSet):
     """Вьюсет для рецептов."""
 
     queryset = Recipe.objects.all().order_by('-id')
@@ -192,6 +228,60 @@ class RecipeViewSet(ModelViewSet):
             return CreateRecipeSerializer
         return GetRecipeSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Список из готовых фрагментов рецептов (api.fragments)."""
+        if not settings.RECIPE_FRAGMENTS:
+            return super().list(request, *args, **kwargs)
+        fields = self.get_fieldset()
+        queryset = self.filter_queryset(self.queryset).only('id', 'author_id')
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(render_recipes(
+            [(recipe.pk, recipe.author_id) for recipe in page],
+            request, fields,
+        ))
+
+    def get_count_tags(self):
+        """Теги кэша числа рецептов в списке (core.counts): фильтры
+        is_favorited и is_in_shopping_cart зависят от пользователя."""
+        tags = ['recipes']
+        if self.request.user.is_authenticated:
+            tags.append(f'user:{self.request.user.pk}')
+        return tags
+
+    def get_queryset(self):
+        """Связанные данные загружаются только для запрошенных полей."""
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        fields = self.get_fieldset()
+        user = self.request.user
+        if 'author' in fields and user.is_authenticated:
+            queryset = queryset.prefetch_related(Prefetch(
+                'author',
+                queryset=annotate_subscribed(User.objects.all(), user),
+            ))
+        elif 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'ingredient',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ),
+            ))
+        if user.is_authenticated:
+            for name, model in (
+                ('is_favorited', Favorite),
+                ('is_in_shopping_cart', ShoppingCart),
+            ):
+                if name in fields:
+                    queryset = queryset.annotate(**{name: Exists(
+                        model.objects.filter(user=user, recipe=OuterRef('pk'))
+                    )})
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -209,6 +299,32 @@ class RecipeViewSet(ModelViewSet):
             return Response({'short-link': short_link})
         return Response(status=status.HTTP_404_NOT_FOUND)
 
+    @action(
+        detail=True,
+        methods=['get'],
+        permission_classes=[AllowAny]
+    )
+    def similar(self, request, pk):
+        """Похожие по составу рецепты из таблицы RecipeNeighbour."""
+        try:
+            limit = min(
+                int(request.query_params.get('limit', SIMILAR_RECIPES_LIMIT)),
+                SIMILAR_RECIPES_LIMIT
+            )
+        except ValueError:
+            limit = SIMILAR_RECIPES_LIMIT
+        neighbours = list(RecipeNeighbour.objects.filter(
+            recipe_id=pk, recipe__deleted_at__isnull=True,
+            neighbour__deleted_at__isnull=True,
+        ).select_related('neighbour').order_by('-score')[:max(limit, 0)])
+        if not neighbours:
+            get_object_or_404(Recipe, pk=pk)
+        serializer = ShortRecipeSerializer(
+            [neighbour.neighbour for neighbour in neighbours],
+            many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
     @action(
         detail=True,
         methods=['post'],
@@ -243,7 +359,9 @@ class RecipeViewSet(ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        shopping_cart = ShoppingCart.objects.filter(user=self.request.user)
+        shopping_cart = ShoppingCart.objects.filter(
+            user=self.request.user, recipe__deleted_at__isnull=True
+        )
         recipes = [item.recipe.id for item in shopping_cart]
         buy_objects = (
             RecipeIngredient.objects.filter(recipe__in=recipes)
@@ -296,3 +414,30 @@ class RecipeViewSet(ModelViewSet):
             favorite.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def signed_token(request):
+    """Выдаёт подписанный токен для заголовка Authorization: Signed."""
+    return Response({
+        'auth_token': make_signed_token(request.user),
+        'keyword': SIGNED_TOKEN_KEYWORD,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    """Выполняет несколько GET-запросов к API за один запрос."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response(run_batch(request, [
+        item['url'] for item in serializer.validated_data['requests']
+    ]))
+
+
+# Пакет только читает данные, см. core.middleware.ReadReplicaMiddleware.
+batch.read_only = True
+# Подзапросы пакета ограничиваются по отдельности, см. core.shedding.
+batch.limits_subrequests = True
@@ -0,0 +1,102 @@
+"""Сравнение синхронного WSGI и асинхронного ASGI стека под нагрузкой.
+
+Оба сервера запускаются gunicorn с одинаковым числом воркеров,
+поэтому занимают сопоставимую память; RSS замеряется после прогона.
+
+    cd backend
+    python -m benchmarks.async_vs_sync --workers 2 --concurrency 64
+
+Нужна заполненная база, например после generate_dataset.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.loadgen import process_tree_rss, run_load
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?page=2',
+    '/api/tags/',
+    '/api/ingredients/?name=са',
+)
+SERVERS = {
+    'sync': (
+        ['foodgram.wsgi:application', '-k', 'sync'],
+        {'ASYNC_READ_API': 'False'},
+    ),
+    'async': (
+        ['foodgram.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+        {'ASYNC_READ_API': 'True'},
+    ),
+}
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Сервер {url} не запустился')
+
+
+def bench(name, port, args):
+    target, env = SERVERS[name]
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', *target,
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(args.workers),
+            '--log-level', 'warning',
+        ],
+        env={**os.environ, **env},
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base_url + args.paths[0])
+        headers = {}
+        if args.token:
+            headers['Authorization'] = f'Token {args.token}'
+        asyncio.run(run_load(
+            base_url, args.paths, args.concurrency, args.warmup, headers
+        ))
+        result = asyncio.run(run_load(
+            base_url, args.paths, args.concurrency, args.duration, headers
+        ))
+        result['rss_mb'] = process_tree_rss(process.pid)
+        return result
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--port', type=int, default=8101)
+    parser.add_argument('--token', default='', help='токен пользователя')
+    parser.add_argument('--paths', nargs='+', default=list(DEFAULT_PATHS))
+    parser.add_argument('--output', default=None, help='файл для JSON')
+    args = parser.parse_args()
+    results = {}
+    for offset, name in enumerate(SERVERS):
+        results[name] = bench(name, args.port + offset, args)
+        print(name, json.dumps(results[name]))
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
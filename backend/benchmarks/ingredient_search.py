@@ -0,0 +1,59 @@
+"""Задержка поиска ингредиентов (recipes.search).
+
+Для набора запросов (начало слова, середина слова, опечатки, короткие
+запросы) замеряются медиана и 99-й процентиль времени поиска и
+сравниваются с бюджетом --budget-ms. Поиск идёт через тот же код, что
+и API: в PostgreSQL — по триграммному индексу, иначе — по индексу
+в памяти процесса.
+
+    cd backend
+    python -m benchmarks.ingredient_search --repeat 500
+
+Нужен загруженный справочник ингредиентов (import_csv).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+QUERIES = (
+    'морков', 'моркрвь', 'ковь', 'картофель', 'картофль', 'сыр',
+    'с', 'ма', 'помидоры черри', 'zzz',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--budget-ms', type=float, default=1.0)
+    parser.add_argument('query', nargs='*', default=QUERIES)
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+    from recipes.models import Ingredient
+    from recipes.search import search_ingredients
+
+    over_budget = False
+    for query in args.query:
+        search_ingredients(Ingredient.objects.all(), query)
+        durations = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            found = search_ingredients(Ingredient.objects.all(), query)
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        median = statistics.median(durations)
+        p99 = durations[int(len(durations) * 0.99) - 1]
+        over_budget |= median > args.budget_ms
+        print(
+            f'{query:20} {len(found):>3} шт. '
+            f'p50 {median:7.3f} мс  p99 {p99:7.3f} мс'
+            f'{"  > бюджета" if median > args.budget_ms else ""}'
+        )
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
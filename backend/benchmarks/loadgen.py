@@ -0,0 +1,166 @@
+"""Простой асинхронный генератор HTTP-нагрузки без внешних зависимостей.
+
+Каждый виртуальный клиент держит своё keep-alive соединение и
+отправляет запросы один за другим до окончания отведённого времени.
+"""
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """HTTP/1.1 соединение с сервером."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        """Отправляет запрос, возвращает (статус, заголовки, тело)."""
+        if self.writer is None:
+            await self.open()
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Connection: keep-alive',
+        ]
+        for name, value in (headers or {}).items():
+            lines.append(f'{name}: {value}')
+        if body is not None:
+            lines.append(f'Content-Length: {len(body)}')
+            names = {name.lower() for name in headers or {}}
+            if 'content-type' not in names:
+                lines.append('Content-Type: application/json')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        if body:
+            self.writer.write(body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            self.close()
+            raise ConnectionError('Соединение закрыто сервером')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        if 'content-length' in response_headers:
+            content = await self.reader.readexactly(
+                int(response_headers['content-length'])
+            )
+        elif response_headers.get('transfer-encoding') == 'chunked':
+            content = b''
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                content += await self.reader.readexactly(size)
+                await self.reader.readline()
+        else:
+            content = await self.reader.read()
+            self.close()
+        if response_headers.get('connection') == 'close':
+            self.close()
+        return status, response_headers, content
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Сводка по списку задержек в секундах."""
+    total = len(latencies) + errors
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0,
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0,
+        'p50_ms': ms(percentile(latencies, 0.5)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+    }
+
+
+def ms(value):
+    return None if value is None else round(value * 1000, 2)
+
+
+async def run_load(base_url, paths, concurrency, duration, headers=None):
+    """Гоняет GET-запросы по кругу по paths с concurrency клиентами."""
+    parts = urlsplit(base_url)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client(number):
+        nonlocal errors
+        connection = Connection(parts.hostname, parts.port or 80)
+        index = number
+        try:
+            while time.monotonic() < deadline:
+                path = paths[index % len(paths)]
+                index += 1
+                started = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request(
+                        'GET', path, headers
+                    )
+                except (ConnectionError, OSError, ValueError,
+                        asyncio.IncompleteReadError):
+                    errors += 1
+                    connection.close()
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    return summarize(latencies, errors, time.monotonic() - started)
+
+
+def process_tree_rss(pid):
+    """Суммарный RSS процесса и его потомков в мегабайтах (Linux)."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            children_path = f'/proc/{current}/task/{current}/children'
+            if os.path.exists(children_path):
+                with open(children_path) as file:
+                    pending.extend(int(child) for child in file.read().split())
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return round(total / 1024, 1)
@@ -0,0 +1,102 @@
+"""Время рендеринга и размер сжатой страницы рецептов.
+
+Страница из --limit рецептов сериализуется один раз, затем
+рендерится стандартным JSONRenderer DRF и FastJSONRenderer и
+сжимается gzip и brotli (если установлен) разной степени.
+
+    cd backend
+    python -m benchmarks.render_compression --limit 50
+
+Нужна заполненная база, например после generate_dataset.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import time
+
+
+def timed(function, repeat):
+    """Медиана времени вызова в миллисекундах и результат."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - started)
+    return round(statistics.median(durations) * 1000, 3), result
+
+
+def recipe_page(limit):
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework.test import APIRequestFactory
+
+    from api.serializers import GetRecipeSerializer
+    from recipes.models import Recipe
+
+    request = APIRequestFactory().get('/api/recipes/')
+    request.user = AnonymousUser()
+    recipes = Recipe.objects.select_related('author').prefetch_related(
+        'tags', 'ingredient__ingredient'
+    ).order_by('-id')[:limit]
+    return {
+        'count': Recipe.objects.count(),
+        'next': None,
+        'previous': None,
+        'results': GetRecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', default=None, help='файл для JSON')
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from api.renderers import FastJSONRenderer
+    from core.compression import brotli
+
+    data = recipe_page(args.limit)
+    results = {'recipes': len(data['results']), 'render': {}, 'wire': {}}
+    for name, renderer in (
+        ('drf_json', JSONRenderer()),
+        ('fast_json', FastJSONRenderer()),
+    ):
+        duration, content = timed(lambda: renderer.render(data), args.repeat)
+        results['render'][name] = {'ms': duration, 'bytes': len(content)}
+    content = FastJSONRenderer().render(data)
+    compressors = {'identity': lambda: content}
+    for level in (1, 6, 9):
+        compressors[f'gzip-{level}'] = (
+            lambda level=level: gzip.compress(content, level, mtime=0)
+        )
+    if brotli is not None:
+        for quality in (4, 11):
+            compressors[f'br-{quality}'] = (
+                lambda quality=quality: brotli.compress(
+                    content, quality=quality
+                )
+            )
+    for name, compress in compressors.items():
+        duration, compressed = timed(compress, args.repeat)
+        results['wire'][name] = {'ms': duration, 'bytes': len(compressed)}
+    for section in ('render', 'wire'):
+        for name, values in results[section].items():
+            print(
+                f'{section:7} {name:10} {values["bytes"]:>9} байт '
+                f'{values["ms"]:>9.3f} мс'
+            )
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
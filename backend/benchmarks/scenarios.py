@@ -0,0 +1,477 @@
+"""Нагрузочный тест по сценариям из Postman-коллекции.
+
+Шаги сценариев — запросы коллекции postman_collection с её методами,
+адресами, телами и авторизацией; переменные {{...}} подставляются из
+значений коллекции по умолчанию, аккаунтов виртуального клиента и
+случайных рецептов, тегов, ингредиентов и авторов локальной базы.
+Значения, которые вернул сервер (id рецепта, токен), подставляются
+в следующие шаги сценария, как в тестах коллекции.
+
+Каждый виртуальный клиент выбирает сценарий по весам и проходит его
+шаги по своему keep-alive соединению (benchmarks.loadgen); при ошибке
+остаток сценария пропускается. Отчёт — пропускная способность,
+p50/p95/p99 и доля ошибок по каждому запросу коллекции — сохраняется
+в JSON; с --baseline сравнивается с отчётом прошлого релиза.
+
+Аккаунты клиентов (load-N@loadtest.invalid) создаются в базе перед
+прогоном, их избранное, корзина, подписки и рецепты сбрасываются.
+Без --base-url сервер запускается gunicorn на той же базе.
+
+    cd backend
+    python manage.py generate_dataset --users 1000
+    python -m benchmarks.scenarios --concurrency 32 --duration 60 \\
+        --output load.json
+    python -m benchmarks.scenarios --baseline load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from benchmarks.async_vs_sync import wait_ready
+from benchmarks.loadgen import Connection, summarize
+
+COLLECTION = (
+    Path(__file__).resolve().parents[2]
+    / 'postman_collection' / 'foodgram.postman_collection.json'
+)
+VARIABLE = re.compile(r'\{\{(\w+)\}\}')
+ACCOUNT_DOMAIN = 'loadtest.invalid'
+POOL_SIZE = 1000
+
+# Сценарий: вес и шаги — (имя запроса коллекции, {переменная: поле
+# ответа}). Имена — как в коллекции, с пометкой авторизации.
+SCENARIOS = {
+    'guest': (40, [
+        ('get_recipes_list // No Auth', {}),
+        ('get_recipe_detail // No Auth', {}),
+        ('get_tag_list // No Auth', {}),
+        ('get_profile // No Auth', {}),
+    ]),
+    'reader': (30, [
+        ('get_recipes_list // User', {}),
+        ('get_recipes_list_with_two_tags_param // User', {}),
+        ('get_recipe_detail // User', {}),
+        ('get_ingredients_list_with_name_filter // User', {}),
+        ('get_subscription_list // User', {}),
+    ]),
+    'shopper': (15, [
+        ('add_to_favorite // User', {}),
+        ('add_to_shopping_cart // User', {}),
+        ('get_recipes_list_with_is_in_shopping_cart_param // User', {}),
+        ('download_shopping_cart // User', {}),
+        ('remove_from_shopping_cart // User', {}),
+        ('remove_from_favorite // User', {}),
+    ]),
+    'social': (5, [
+        ('create_subscription // User', {}),
+        ('get_subscription_list_with_recipes_limit_param // User', {}),
+        ('delete_first_subscription // User', {}),
+    ]),
+    'cook': (5, [
+        ('create_first_recipe // Second User', {'firstRecipeId': 'id'}),
+        ('update_recipe // Second User', {}),
+        ('get_recipe_detail // User', {}),
+        ('delete_first_recipe // Second User', {}),
+    ]),
+    'signup': (5, [
+        ('create_first_user', {'userId': 'id'}),
+        ('get_token_for_first_user', {'userToken': 'auth_token'}),
+        ('users_me // User', {}),
+        ('logout // User', {}),
+    ]),
+}
+
+
+def load_collection(path=COLLECTION):
+    """Запросы коллекции по имени и значения её переменных.
+
+    Возвращает ({имя: (метод, адрес, тело, заголовки)}, переменные,
+    имена переменных со значениями-литералами JSON). Авторизация
+    наследуется от папок; из повторяющихся имён берётся первое.
+    """
+    with open(path, encoding='utf8') as file:
+        collection = json.load(file)
+    requests = {}
+
+    def walk(items, auth):
+        for item in items:
+            item_auth = (item.get('request') or item).get('auth') or auth
+            if 'item' in item:
+                walk(item['item'], item_auth)
+                continue
+            request = item['request']
+            url = request['url']
+            url = url['raw'] if isinstance(url, dict) else url
+            headers = {
+                header['key']: header['value']
+                for header in request.get('header', ())
+                if not header.get('disabled')
+            }
+            if item_auth and item_auth['type'] == 'apikey':
+                apikey = {
+                    entry['key']: entry['value']
+                    for entry in item_auth['apikey']
+                }
+                headers[apikey['key']] = apikey['value']
+            body = (request.get('body') or {}).get('raw') or None
+            requests.setdefault(' '.join(item['name'].split()), (
+                request['method'], url.replace('{{baseUrl}}', ''),
+                body, headers,
+            ))
+
+    walk(collection['item'], collection.get('auth'))
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', ())
+        if variable['key'] != 'baseUrl'
+    }
+    literals = {
+        key for key, value in variables.items() if value.startswith('"')
+    }
+    return requests, variables, literals
+
+
+def render(template, variables, literals, in_url=False):
+    """Подставляет переменные {{...}}: в адресе — с кодированием,
+    литералы JSON в теле — как строки JSON."""
+
+    def value(match):
+        name = match[1]
+        current = variables[name]
+        if in_url:
+            return quote(str(current), safe='')
+        if name in literals and not str(current).startswith('"'):
+            return json.dumps(current, ensure_ascii=False)
+        return str(current)
+
+    return VARIABLE.sub(value, template)
+
+
+def prepare_database(clients):
+    """Аккаунты клиентов и выборки из базы для переменных.
+
+    Возвращает (переменные каждого клиента, выборки). Состояние
+    аккаунтов с прошлого прогона сбрасывается.
+    """
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart,
+                                Tag)
+    from users.models import Follow, User
+
+    _, defaults, _ = load_collection()
+    emails = [f'load-{number}@{ACCOUNT_DOMAIN}' for number in range(
+        clients * 2
+    )]
+    existing = set(
+        User.objects.filter(email__in=emails).values_list('email', flat=True)
+    )
+    password = make_password(json.loads(defaults['password']))
+    User.objects.bulk_create([
+        User(
+            email=email, username=email.partition('@')[0],
+            first_name='Нагрузка', last_name='Тест', password=password,
+        )
+        for email in emails if email not in existing
+    ])
+    accounts = list(User.objects.filter(email__in=emails))
+    accounts.sort(key=lambda user: emails.index(user.email))
+    tokens = dict(Token.objects.filter(user__in=accounts).values_list(
+        'user_id', 'key'
+    ))
+    created = [
+        Token(user=user, key=Token.generate_key())
+        for user in accounts if user.pk not in tokens
+    ]
+    Token.objects.bulk_create(created)
+    tokens.update((token.user_id, token.key) for token in created)
+    Favorite.objects.filter(user__in=accounts).delete()
+    ShoppingCart.objects.filter(user__in=accounts).delete()
+    Follow.objects.filter(user__in=accounts).delete()
+    Recipe.objects.filter(author__in=accounts).delete()
+
+    pools = {
+        'recipes': list(Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:POOL_SIZE]),
+        'authors': list(Recipe.objects.exclude(author__in=accounts).order_by(
+            'author_id'
+        ).values_list('author_id', flat=True).distinct()[:POOL_SIZE]),
+        'tags': list(Tag.objects.values_list('id', 'slug')),
+        'ingredients': list(Ingredient.objects.order_by('id').values_list(
+            'id', 'name'
+        )[:POOL_SIZE]),
+    }
+    if not pools['recipes'] or not pools['authors'] or (
+        len(pools['tags']) < 3 or len(pools['ingredients']) < 2
+    ):
+        raise SystemExit(
+            'В базе нет данных: python manage.py generate_dataset'
+        )
+    variables = []
+    for user, second in zip(accounts[::2], accounts[1::2]):
+        variables.append({
+            **defaults,
+            'userId': user.pk,
+            'userToken': tokens[user.pk],
+            'secondUserId': second.pk,
+            'secondUserToken': tokens[second.pk],
+        })
+    return variables, pools
+
+
+def cleanup_database():
+    """Удаляет пользователей, зарегистрированных сценарием signup."""
+    from users.models import User
+
+    User.objects.filter(
+        email__startswith='signup-', email__endswith=f'@{ACCOUNT_DOMAIN}'
+    ).delete()
+
+
+def draw(rng, pools, variables):
+    """Случайные значения переменных для одного прохода сценария."""
+    tags = rng.sample(pools['tags'], 3)
+    ingredients = rng.sample(pools['ingredients'], 2)
+    authors = [
+        pk for pk in rng.sample(
+            pools['authors'], min(2, len(pools['authors']))
+        ) if pk != variables['userId']
+    ]
+    signup = f'signup-{uuid.uuid4().hex[:12]}'
+    return {
+        'firstRecipeId': rng.choice(pools['recipes']),
+        'thirdUserId': authors[0] if authors else variables['secondUserId'],
+        'firstTagId': tags[0][0],
+        'secondTagId': tags[1][0],
+        'secondTagSlug': tags[1][1],
+        'thirdTagSlug': tags[2][1],
+        'firstIndredientId': ingredients[0][0],
+        'secondIndredientId': ingredients[1][0],
+        'ingredientNameFirstLatter': ingredients[0][1][:1],
+        'email': f'{signup}@{ACCOUNT_DOMAIN}',
+        'username': signup,
+    }
+
+
+async def run_scenarios(base_url, requests, literals, clients, pools,
+                        concurrency, duration, seed=0):
+    """Гоняет сценарии concurrency клиентами duration секунд.
+
+    Возвращает отчёт: сводку, число проходов сценариев и сводку по
+    каждому запросу коллекции (метод и адрес с переменными).
+    """
+    parts = urlsplit(base_url)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    endpoints = defaultdict(
+        lambda: {'latencies': [], 'errors': 0, 'statuses': Counter()}
+    )
+    runs = Counter()
+    deadline = time.monotonic() + duration
+
+    async def call(connection, step, variables):
+        method, url, body, headers = requests[step]
+        endpoint = endpoints[f'{method} {url}']
+        started = time.perf_counter()
+        try:
+            status, _, content = await connection.request(
+                method, render(url, variables, literals, in_url=True),
+                {
+                    name: render(value, variables, literals)
+                    for name, value in headers.items()
+                },
+                None if body is None else render(
+                    body, variables, literals
+                ).encode(),
+            )
+        except (ConnectionError, OSError, ValueError,
+                asyncio.IncompleteReadError):
+            connection.close()
+            endpoint['errors'] += 1
+            endpoint['statuses']['error'] += 1
+            return None
+        endpoint['statuses'][str(status)] += 1
+        if status >= 400:
+            endpoint['errors'] += 1
+            return None
+        endpoint['latencies'].append(time.perf_counter() - started)
+        return content
+
+    async def client(number):
+        rng = random.Random(seed + number)
+        base = clients[number]
+        connection = Connection(parts.hostname, parts.port or 80)
+        try:
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                runs[name] += 1
+                variables = {**base, **draw(rng, pools, base)}
+                for step, captures in SCENARIOS[name][1]:
+                    content = await call(connection, step, variables)
+                    if content is None:
+                        break
+                    if captures:
+                        data = json.loads(content)
+                        for variable, field in captures.items():
+                            variables[variable] = data[field]
+        finally:
+            connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    elapsed = time.monotonic() - started
+    latencies = [
+        latency for endpoint in endpoints.values()
+        for latency in endpoint['latencies']
+    ]
+    return {
+        'total': summarize(
+            latencies,
+            sum(endpoint['errors'] for endpoint in endpoints.values()),
+            elapsed,
+        ),
+        'scenarios': {
+            name: {'weight': SCENARIOS[name][0], 'runs': runs[name]}
+            for name in names
+        },
+        'endpoints': {
+            name: {
+                **summarize(
+                    endpoint['latencies'], endpoint['errors'], elapsed
+                ),
+                'statuses': dict(endpoint['statuses']),
+            }
+            for name, endpoint in sorted(endpoints.items())
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Печатает изменение p95 и пропускной способности по запросам.
+    Возвращает True, если p95 какого-либо запроса вырос больше чем на
+    tolerance процентов."""
+    regressed = False
+    print(f'\n{"запрос":64} {"p95 было":>9} {"стало":>9} {"rps":>8}')
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None or not previous['p95_ms'] or (
+            current['p95_ms'] is None
+        ):
+            continue
+        change = (current['p95_ms'] / previous['p95_ms'] - 1) * 100
+        over = change > tolerance
+        regressed |= over
+        print(
+            f'{name[:64]:64} {previous["p95_ms"]:9.1f} '
+            f'{current["p95_ms"]:9.1f} {current["throughput_rps"]:8.1f} '
+            f'{change:+6.0f}%{"  > допуска" if over else ""}'
+        )
+    return regressed
+
+
+def start_server(port, workers):
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', 'foodgram.wsgi:application',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--log-level', 'warning',
+        ],
+        env=os.environ.copy(),
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base_url + '/api/tags/')
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--base-url', default=None,
+        help='адрес запущенного сервера; по умолчанию запускается gunicorn'
+    )
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8111)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='файл для JSON')
+    parser.add_argument(
+        '--baseline', default=None, help='отчёт JSON для сравнения'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=20,
+        help='допустимый рост p95 относительно --baseline, %%'
+    )
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+
+    django.setup()
+    requests, _, literals = load_collection()
+    clients, pools = prepare_database(args.concurrency)
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        process, base_url = start_server(args.port, args.workers)
+    try:
+        if args.warmup:
+            asyncio.run(run_scenarios(
+                base_url, requests, literals, clients, pools,
+                args.concurrency, args.warmup, args.seed,
+            ))
+        report = asyncio.run(run_scenarios(
+            base_url, requests, literals, clients, pools,
+            args.concurrency, args.duration, args.seed,
+        ))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        cleanup_database()
+    report['config'] = {
+        'base_url': base_url,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'seed': args.seed,
+    }
+    print(json.dumps(report['total']))
+    print(
+        f'\n{"запрос":64} {"rps":>8} {"p50":>8} {"p95":>8} {"p99":>8} '
+        f'{"ошибки":>7}'
+    )
+    for name, endpoint in report['endpoints'].items():
+        print(
+            f'{name[:64]:64} {endpoint["throughput_rps"]:8.1f} '
+            f'{endpoint["p50_ms"] or 0:8.1f} {endpoint["p95_ms"] or 0:8.1f} '
+            f'{endpoint["p99_ms"] or 0:8.1f} '
+            f'{endpoint["error_rate"] * 100:6.1f}%'
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding='utf8') as file:
+            baseline = json.load(file)
+        sys.exit(1 if compare(report, baseline, args.tolerance) else 0)
+
+
+if __name__ == '__main__':
+    main()
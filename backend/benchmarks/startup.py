@@ -0,0 +1,66 @@
+"""Время запуска и память процесса Django (core.startup).
+
+Каждая цель запускается --repeat раз в новом интерпретаторе:
+setup — команды manage.py без системных проверок, check — с
+проверками (загрузка URLconf), wsgi — воркер gunicorn. Медиана
+времени запуска процесса и пиковая память сравниваются с бюджетом
+цели, превышение завершает бенчмарк с кодом 1. Подробности по
+пакетам — в команде profile_startup.
+
+    cd backend
+    python -m benchmarks.startup --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+
+# Бюджеты по умолчанию: время запуска процесса, мс, и пиковая память, МБ.
+BUDGETS = {
+    'setup': (800, 64),
+    'check': (1500, 96),
+    'wsgi': (1500, 96),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--target', action='append', choices=tuple(BUDGETS),
+        help='цель замера, можно указать несколько раз; по умолчанию все'
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--budget-ms', type=float, default=None,
+        help='бюджет времени для всех целей вместо значений по умолчанию'
+    )
+    parser.add_argument(
+        '--budget-mb', type=float, default=None,
+        help='бюджет памяти для всех целей вместо значений по умолчанию'
+    )
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from core.startup import measure
+
+    over_budget = False
+    for target in args.target or BUDGETS:
+        budget_ms, budget_mb = BUDGETS[target]
+        budget_ms = args.budget_ms or budget_ms
+        budget_mb = args.budget_mb or budget_mb
+        reports = [measure(target) for _ in range(args.repeat)]
+        wall = statistics.median(report['wall'] for report in reports) * 1000
+        own = statistics.median(report['seconds'] for report in reports)
+        rss = max(report['rss'] for report in reports) / 2 ** 20
+        over = wall > budget_ms or rss > budget_mb
+        over_budget |= over
+        print(
+            f'{target:6} процесс p50 {wall:6.0f} мс  '
+            f'цель p50 {own * 1000:6.0f} мс  '
+            f'память {rss:5.1f} МБ  модулей {reports[0]["modules"]}'
+            f'{"  > бюджета" if over else ""}'
+        )
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import io
+import os
+import pstats
+
+from django.contrib import admin
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from core.models import Job, ProfileReport
+
+TOP_FUNCTIONS = 40
+
+
+class ProfileReportAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'created', 'method', 'path', 'status',
+        'duration_ms', 'trigger', 'user', 'downloads',
+    )
+    list_filter = ('trigger', 'view', 'method')
+    search_fields = ('path', 'view', 'user__username')
+    readonly_fields = (
+        'created', 'method', 'path', 'view', 'status', 'duration_ms',
+        'trigger', 'user', 'downloads', 'top_functions',
+    )
+    exclude = ('stats_file', 'collapsed_file')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download),
+                name='core_profilereport_download',
+            ),
+        ] + super().get_urls()
+
+    def download(self, request, pk, kind):
+        report = get_object_or_404(ProfileReport, pk=pk)
+        name = {
+            'pstats': report.stats_file,
+            'collapsed': report.collapsed_file,
+        }.get(kind)
+        if name is None or not os.path.exists(report.file_path(name)):
+            raise Http404
+        return FileResponse(
+            open(report.file_path(name), 'rb'),
+            as_attachment=True,
+            filename=name,
+        )
+
+    @admin.display(description='Файлы')
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">pstats</a> | <a href="{}">collapsed</a>',
+            reverse('admin:core_profilereport_download',
+                    args=(obj.pk, 'pstats')),
+            reverse('admin:core_profilereport_download',
+                    args=(obj.pk, 'collapsed')),
+        )
+
+    @admin.display(description='Самые затратные функции')
+    def top_functions(self, obj):
+        output = io.StringIO()
+        try:
+            stats = pstats.Stats(
+                obj.file_path(obj.stats_file), stream=output
+            )
+        except OSError:
+            return 'Файл профиля не найден'
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        return format_html('<pre>{}</pre>', output.getvalue())
+
+
+admin.site.register(ProfileReport, ProfileReportAdmin)
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'task', 'status', 'priority', 'attempts', 'run_at',
+        'created', 'finished', 'locked_by',
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'dedup_key')
+    readonly_fields = (
+        'task', 'payload', 'status', 'dedup_key', 'attempts', 'locked_by',
+        'locked_at', 'last_error', 'created', 'finished',
+    )
+    actions = ('retry',)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        retried = 0
+        for job_id in queryset.filter(status=Job.FAILED).values_list(
+                'id', flat=True
+        ):
+            try:
+                with transaction.atomic():
+                    retried += Job.objects.filter(pk=job_id).update(
+                        status=Job.QUEUED, attempts=0,
+                        run_at=timezone.now(), finished=None,
+                    )
+            except IntegrityError:
+                # Такая же задача уже ждёт в очереди.
+                continue
+        self.message_user(request, f'Поставлено в очередь: {retried}')
+
+
+admin.site.register(Job, JobAdmin)
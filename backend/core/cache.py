@@ -0,0 +1,226 @@
+"""Двухуровневый кэш с инвалидацией по тегам.
+
+Первый уровень — LRU внутри процесса с коротким сроком жизни
+(CACHE_LOCAL_TTL), второй — общий для воркеров кэш Django из CACHES.
+Каждая запись помнит версии своих тегов ("recipe:42", "user:7",
+"tags"); invalidate() меняет версии тегов в общем кэше, и записи со
+старыми версиями считаются отсутствующими. Локальные записи с этими
+тегами удаляются сразу в текущем процессе, в остальных — не позже
+CACHE_LOCAL_TTL.
+
+Значения из локального уровня отдаются без копирования: их нельзя
+изменять.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.metrics import registry
+
+CACHE_REQUESTS = registry.counter(
+    'foodgram_cache_requests_total',
+    'Обращения к двухуровневому кэшу', ('tier', 'result'),
+)
+CACHE_INVALIDATIONS = registry.counter(
+    'foodgram_cache_invalidations_total', 'Инвалидированные теги кэша',
+)
+
+MISSING = object()
+
+
+class LocalLRU:
+    """Ограниченный по числу записей LRU со сроком жизни записей."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, tags):
+        if not self.max_entries:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value, tags)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def drop_tags(self, tags):
+        tags = set(tags)
+        with self.lock:
+            stale = [
+                key for key, (_, _, entry_tags) in self.entries.items()
+                if tags.intersection(entry_tags)
+            ]
+            for key in stale:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TaggedCache:
+
+    def __init__(self, alias='default', max_entries=1000, local_ttl=5):
+        self.alias = alias
+        self.local = LocalLRU(max_entries, local_ttl)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def entry_key(key):
+        return f'entry:{key}'
+
+    @staticmethod
+    def tag_key(tag):
+        return f'tag:{tag}'
+
+    def tag_versions(self, tags):
+        """Текущие версии тегов; отсутствующие создаются."""
+        if not tags:
+            return {}
+        keys = {self.tag_key(tag): tag for tag in tags}
+        found = self.shared.get_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            self.shared.set_many(missing, timeout=None)
+            found.update(missing)
+        return {keys[key]: version for key, version in found.items()}
+
+    def get(self, key, default=None):
+        entry = self.local.get(key)
+        if entry is not None:
+            CACHE_REQUESTS.inc(tier='local', result='hit')
+            return entry[1]
+        CACHE_REQUESTS.inc(tier='local', result='miss')
+        stored = self.shared.get(self.entry_key(key))
+        if stored is not None:
+            value, versions = stored
+            if self.tag_versions(versions) == versions:
+                CACHE_REQUESTS.inc(tier='shared', result='hit')
+                self.local.set(key, value, tuple(versions))
+                return value
+        CACHE_REQUESTS.inc(tier='shared', result='miss')
+        return default
+
+    def get_many(self, keys):
+        """Словарь найденных значений по ключам за два обращения
+        к общему кэшу."""
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self.local.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = entry[1]
+        CACHE_REQUESTS.inc(len(found), tier='local', result='hit')
+        CACHE_REQUESTS.inc(len(missing), tier='local', result='miss')
+        if not missing:
+            return found
+        stored = self.shared.get_many(
+            [self.entry_key(key) for key in missing]
+        )
+        current = self.tag_versions(
+            {tag for _, versions in stored.values() for tag in versions}
+        )
+        hits = 0
+        for key in missing:
+            item = stored.get(self.entry_key(key))
+            if item is None:
+                continue
+            value, versions = item
+            if all(current[tag] == version
+                   for tag, version in versions.items()):
+                found[key] = value
+                self.local.set(key, value, tuple(versions))
+                hits += 1
+        CACHE_REQUESTS.inc(hits, tier='shared', result='hit')
+        CACHE_REQUESTS.inc(len(missing) - hits, tier='shared', result='miss')
+        return found
+
+    def set(self, key, value, tags=(), timeout=None):
+        """Сохраняет значение с версиями тегов на момент записи.
+
+        Версии нужно брать до построения значения (см. get_or_set),
+        иначе инвалидация во время построения потеряется.
+        """
+        self.store(key, value, self.tag_versions(tags), timeout)
+
+    def store(self, key, value, versions, timeout):
+        if timeout is None:
+            timeout = settings.CACHE_DEFAULT_TIMEOUT
+        self.shared.set(self.entry_key(key), (value, versions), timeout)
+        self.local.set(key, value, tuple(versions))
+
+    def store_many(self, entries, versions, timeout=None):
+        """Сохраняет {ключ: (значение, теги)} с версиями тегов из
+        versions, полученными до построения значений."""
+        if timeout is None:
+            timeout = settings.CACHE_DEFAULT_TIMEOUT
+        stored = {}
+        for key, (value, tags) in entries.items():
+            entry_versions = {tag: versions[tag] for tag in tags}
+            stored[self.entry_key(key)] = (value, entry_versions)
+            self.local.set(key, value, tuple(tags))
+        self.shared.set_many(stored, timeout)
+
+    def get_or_set(self, key, build, tags=(), timeout=None):
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        versions = self.tag_versions(tags)
+        value = build()
+        self.store(key, value, versions, timeout)
+        return value
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(self.entry_key(key))
+
+    def invalidate(self, *tags):
+        """Делает устаревшими все записи с любым из тегов."""
+        if not tags:
+            return
+        self.local.drop_tags(tags)
+        self.shared.set_many(
+            {self.tag_key(tag): time.time_ns() for tag in tags},
+            timeout=None,
+        )
+        CACHE_INVALIDATIONS.inc(len(tags))
+
+
+tagged_cache = TaggedCache(
+    alias=settings.TAGGED_CACHE_ALIAS,
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    local_ttl=settings.CACHE_LOCAL_TTL,
+)
+
+
+def invalidate_on_commit(*tags, using=None):
+    """Инвалидация после фиксации транзакции, чтобы параллельный
+    запрос не положил в кэш ещё не изменённые данные."""
+    transaction.on_commit(lambda: tagged_cache.invalidate(*tags), using)
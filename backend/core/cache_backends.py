@@ -0,0 +1,26 @@
+import time
+
+from django.core.cache.backends import filebased
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Файловый кэш, проверяющий переполнение не при каждой записи.
+
+    Стандартный бэкенд перечисляет все файлы кэша при каждом set, и
+    при десятках тысяч записей запись становится линейной по размеру
+    кэша. Здесь проверка выполняется не чаще раза в CULL_INTERVAL
+    секунд на процесс.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._cull_interval = options.get('CULL_INTERVAL', 60)
+        self._next_cull = 0
+
+    def _cull(self):
+        now = time.monotonic()
+        if now < self._next_cull:
+            return
+        self._next_cull = now + self._cull_interval
+        super()._cull()
@@ -0,0 +1,135 @@
+"""Сжатие ответов gzip и brotli.
+
+Сжимаются только ответы не меньше COMPRESSION_MIN_SIZE байт с типом из
+COMPRESSION_CONTENT_TYPES: JSON API и текстовый список покупок.
+brotli используется, если установлен пакет brotli и клиент его
+принимает. Сжатые тела кэшируемых ответов (анонимные GET-запросы или
+Cache-Control: public) хранятся в локальном LRU по хэшу содержимого,
+поэтому одинаковые страницы не сжимаются повторно.
+"""
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.cache import LocalLRU
+from core.metrics import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_RESPONSES = registry.counter(
+    'foodgram_compressed_responses_total',
+    'Сжатые ответы по алгоритму и попаданию в кэш сжатых тел',
+    ('encoding', 'cache'),
+)
+COMPRESSION_BYTES = registry.counter(
+    'foodgram_compression_bytes_total',
+    'Байты ответов до и после сжатия', ('stage',),
+)
+
+ACCEPT_ENCODING = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q=([\d.]+))?')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = set()
+    for part in header.split(','):
+        match = ACCEPT_ENCODING.match(part)
+        if not match:
+            continue
+        name, quality = match.groups()
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.lower())
+    return accepted
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(
+            content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    return gzip.compress(
+        content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+    )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает крупные ответы API с учётом Accept-Encoding."""
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.compressed = LocalLRU(
+            settings.COMPRESSION_CACHE_ENTRIES,
+            settings.COMPRESSION_CACHE_TTL,
+        )
+
+    def process_response(self, request, response):
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.headers.get('Accept-Encoding', '')
+        )
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+        content = response.content
+        if self.cacheable(request, response):
+            key = (encoding, hashlib.sha1(content).digest())
+            entry = self.compressed.get(key)
+            if entry is not None:
+                compressed, cache = entry[1], 'hit'
+            else:
+                compressed, cache = compress(content, encoding), 'miss'
+                self.compressed.set(key, compressed, ())
+        else:
+            compressed, cache = compress(content, encoding), 'none'
+        if len(compressed) >= len(content):
+            return response
+        COMPRESSED_RESPONSES.inc(encoding=encoding, cache=cache)
+        COMPRESSION_BYTES.inc(len(content), stage='in')
+        COMPRESSION_BYTES.inc(len(compressed), stage='out')
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+    @staticmethod
+    def compressible(response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        return content_type.strip() in settings.COMPRESSION_CONTENT_TYPES
+
+    @staticmethod
+    def cacheable(request, response):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        cache_control = response.get('Cache-Control', '')
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return False
+        return (
+            'public' in cache_control
+            or 'Authorization' not in request.headers
+        )
@@ -0,0 +1,12 @@
+DURATION_BUCKETS: tuple = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+SEARCH_DURATION_BUCKETS: tuple = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05
+)
+BATCH_SIZE_BUCKETS: tuple = (1, 2, 3, 5, 10, 20)
+QUERY_COUNT_BUCKETS: tuple = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+N_PLUS_ONE_THRESHOLD: int = 5
+QUERY_SHAPE_LOG_LENGTH: int = 200
+PRIMARY_PIN_COOKIE: str = 'primary_pin'
+PRIMARY_PIN_SECONDS: int = 5
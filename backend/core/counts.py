@@ -0,0 +1,102 @@
+"""Число строк для постраничных списков без COUNT(*) на каждую страницу.
+
+В PostgreSQL сначала берётся оценка планировщика: для запроса без
+условий — reltuples таблицы из pg_class, иначе — число строк плана
+EXPLAIN. Если оценка не меньше PAGINATION_ESTIMATE_THRESHOLD, она и
+возвращается: на больших выборках точный COUNT стоит как сама
+страница, а точность не нужна. Меньшие выборки и другие базы считаются
+точно.
+
+Результат кэшируется в tagged_cache на PAGINATION_COUNT_TTL секунд с
+тегами, которые передаёт представление (например, "recipes" и
+"user:7"), и устаревает вместе с ними при изменении данных. Без тегов
+число не кэшируется.
+
+Оценку уточняет страница, выбранная с одной лишней строкой (settle):
+неполная страница даёт точное число, полная — нижнюю границу, пустая —
+верхнюю.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+
+from core.cache import tagged_cache
+from core.metrics import registry
+
+COUNTS = registry.counter(
+    'foodgram_pagination_counts_total',
+    'Число строк постраничных списков по способу получения', ('kind',),
+)
+
+
+def estimate(queryset):
+    """Оценка числа строк планировщиком PostgreSQL или None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    query = queryset.query
+    with connection.cursor() as cursor:
+        if not query.where and not query.distinct:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # -1: таблица ещё не анализировалась.
+            if row is not None and row[0] >= 0:
+                return int(row[0])
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def compute(queryset):
+    """(число строк, точное ли оно) без кэша."""
+    estimated = estimate(queryset)
+    if estimated is not None and (
+        estimated >= settings.PAGINATION_ESTIMATE_THRESHOLD
+    ):
+        COUNTS.inc(kind='estimate')
+        return estimated, False
+    COUNTS.inc(kind='exact')
+    return queryset.count(), True
+
+
+def count(queryset, tags=None):
+    """(число строк, точное ли оно) с кэшем по тегам."""
+    try:
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return 0, True
+    if tags is None:
+        return compute(queryset)
+    key = 'count:' + hashlib.md5(
+        f'{queryset.db}:{sql}:{params!r}'.encode()
+    ).hexdigest()
+    found = tagged_cache.get(key)
+    if found is not None:
+        COUNTS.inc(kind='cached')
+        return found
+    versions = tagged_cache.tag_versions(tags)
+    found = compute(queryset)
+    tagged_cache.store(key, found, versions, settings.PAGINATION_COUNT_TTL)
+    return found
+
+
+def settle(count, exact, offset, fetched, limit):
+    """Уточняет оценку по странице с offset, выбранной с лимитом
+    limit + 1: fetched — число полученных строк."""
+    if exact:
+        return count, exact
+    if fetched > limit:
+        return max(count, offset + fetched), False
+    if fetched or not offset:
+        return offset + fetched, True
+    # Пустая страница: строк не больше offset.
+    return min(count, offset), False
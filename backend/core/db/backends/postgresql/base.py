@@ -0,0 +1,57 @@
+"""PostgreSQL с пулом соединений внутри процесса.
+
+Подключается как ENGINE 'core.db.backends.postgresql'; размеры пула
+задаются ключом POOL в настройках базы. Закрытие соединения Django
+возвращает его в пул, поэтому CONN_MAX_AGE должен быть 0.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        opened = []
+
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+            opened.append(connection)
+            pool.isolation_level = self.isolation_level
+            return connection
+
+        try:
+            connection = pool.checkout(connect, self.check_pooled)
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+        if not opened:
+            self.isolation_level = pool.isolation_level
+        return connection
+
+    @staticmethod
+    def check_pooled(connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection = self.connection
+        reusable = not self.in_atomic_block
+        try:
+            status = connection.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                reusable = False
+            elif reusable and status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except self.Database.Error:
+            reusable = False
+        self.pool.release(connection, reusable)
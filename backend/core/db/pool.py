@@ -0,0 +1,194 @@
+"""Ограниченный пул соединений с БД внутри процесса.
+
+Соединения, возвращённые Django при закрытии, остаются открытыми и
+выдаются следующим запросам того же процесса. Число соединений
+ограничено сверху, при исчерпании пула запрос ждёт не дольше
+таймаута. Соединения, унаследованные через fork, не используются.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from core.metrics import registry
+
+POOL_WAIT = registry.histogram(
+    'foodgram_db_pool_wait_seconds',
+    'Время ожидания соединения из пула', ('alias',),
+)
+POOL_TIMEOUTS = registry.counter(
+    'foodgram_db_pool_timeouts_total',
+    'Запросы, не дождавшиеся соединения из пула', ('alias',),
+)
+POOL_OPENED = registry.counter(
+    'foodgram_db_pool_opened_total',
+    'Физически открытые пулом соединения', ('alias',),
+)
+POOL_DISCARDED = registry.counter(
+    'foodgram_db_pool_discarded_total',
+    'Соединения, закрытые пулом как неисправные или простаивающие',
+    ('alias',),
+)
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не появилось за отведённое время."""
+
+
+class ConnectionPool:
+
+    def __init__(self, alias, max_size, timeout, max_idle, check_after):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.size = 0
+        self.waiting = 0
+        self.pid = os.getpid()
+        self.isolation_level = None
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max': self.max_size,
+                'open': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+            }
+
+    def reset_after_fork(self):
+        """Забывает соединения родительского процесса, не закрывая их."""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.idle.clear()
+            self.size = 0
+            self.waiting = 0
+
+    def checkout(self, connect, check):
+        """Выдаёт соединение из пула или открывает новое.
+
+        connect() открывает соединение, check(connection) проверяет
+        соединение, долго пролежавшее без дела.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection, last_used = self.take(deadline)
+            if connection is None:
+                break
+            if self.usable(connection, last_used, check):
+                POOL_WAIT.observe(time.monotonic() - started, alias=self.alias)
+                return connection
+            self.discard(connection)
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        POOL_OPENED.inc(alias=self.alias)
+        POOL_WAIT.observe(time.monotonic() - started, alias=self.alias)
+        return connection
+
+    def take(self, deadline):
+        """Берёт свободное соединение или резервирует место под новое."""
+        with self.condition:
+            self.reset_after_fork()
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    POOL_TIMEOUTS.inc(alias=self.alias)
+                    raise PoolTimeout(
+                        f'Пул соединений {self.alias} исчерпан '
+                        f'({self.max_size})'
+                    )
+                self.waiting += 1
+                try:
+                    self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+    def usable(self, connection, last_used, check):
+        if connection.closed:
+            return False
+        idle_for = time.monotonic() - last_used
+        if self.max_idle and idle_for > self.max_idle:
+            return False
+        if idle_for > self.check_after:
+            try:
+                check(connection)
+            except Exception:
+                return False
+        return True
+
+    def discard(self, connection):
+        POOL_DISCARDED.inc(alias=self.alias)
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def release(self, connection, reusable):
+        """Возвращает соединение в пул; неисправное закрывает."""
+        with self.condition:
+            if self.pid != os.getpid():
+                return
+        if not reusable or connection.closed:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def close_all(self):
+        with self.condition:
+            self.reset_after_fork()
+            idle = list(self.idle)
+            self.idle.clear()
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+def get_pool(alias, settings_dict):
+    with pools_lock:
+        if alias not in pools:
+            options = settings_dict.get('POOL', {})
+            pools[alias] = ConnectionPool(
+                alias,
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5),
+                max_idle=options.get('MAX_IDLE', 300),
+                check_after=options.get('CHECK_AFTER', 30),
+            )
+        return pools[alias]
+
+
+def pool_stats():
+    with pools_lock:
+        items = list(pools.items())
+    for alias, pool in items:
+        for state, value in pool.stats().items():
+            yield {'alias': alias, 'state': state}, value
+
+
+registry.gauge(
+    'foodgram_db_pool_connections',
+    'Соединения пула по состояниям', ('alias', 'state'),
+    callback=pool_stats,
+)
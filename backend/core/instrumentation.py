@@ -0,0 +1,103 @@
+"""Сбор статистики запроса: SQL-запросы, время БД и сериализации."""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+current_stats = ContextVar('current_stats', default=None)
+current_wrappers = ContextVar('current_wrappers', default=())
+
+NUMBER_RE = re.compile(r'\b\d+\b')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+PLACEHOLDER_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+
+def dispatch_execute(execute, sql, params, many, context):
+    """Execute_wrapper соединения, вызывающий обёртки текущего контекста.
+
+    Соединения Django привязаны к потоку, а async-ORM ходит в базу из
+    потока sync_to_async, поэтому обёртки нельзя вешать на соединения
+    потока запроса. Диспетчер стоит на каждом соединении, а список
+    обёрток берётся из контекста, который sync_to_async копирует в поток.
+    """
+    for wrapper in reversed(current_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def execute_wrappers(wrapper):
+    """Контекст, в котором wrapper оборачивает SQL-запросы к любой базе."""
+    token = current_wrappers.set(current_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        current_wrappers.reset(token)
+
+
+def query_shape(sql):
+    """Приводит SQL к форме без значений параметров.
+
+    Запросы, отличающиеся только значениями, дают одинаковую форму,
+    по числу повторов формы определяется N+1.
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    return PLACEHOLDER_LIST_RE.sub('(...)', sql)
+
+
+class RequestStats:
+    """Статистика одного HTTP-запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.timings = {}
+        self.active = set()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.query_count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    @contextmanager
+    def track(self, name):
+        """Замеряет время блока; вложенные замеры с тем же именем
+        не суммируются повторно."""
+        if name in self.active:
+            yield
+            return
+        self.active.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active.discard(name)
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - started
+            )
+
+    def repeated_shapes(self, threshold):
+        return [
+            (shape, count) for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def track(name):
+    """Замер времени блока в статистике текущего запроса, если она есть."""
+    stats = current_stats.get()
+    if stats is None:
+        yield
+        return
+    with stats.track(name):
+        yield
@@ -0,0 +1,204 @@
+"""Очередь фоновых задач в таблице core.Job.
+
+Задача — функция, зарегистрированная декоратором @task, параметры
+передаются ей именованными аргументами из JSON. enqueue() добавляет
+задачу в текущей транзакции: если транзакция откатится, задачи не
+будет. Задачи выполняет команда run_worker, в PostgreSQL задачи
+разбираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому воркеров
+может быть несколько.
+
+Сначала берутся задачи с большим приоритетом, затем более ранние.
+Пока задача с ключом дедупликации ждёт в очереди, повторный enqueue
+с тем же ключом возвращает её вместо новой. Упавшая задача
+повторяется с экспоненциальной задержкой, после max_attempts попыток
+остаётся в состоянии failed с текстом ошибки.
+
+Пока задача выполняется, воркер раз в JOB_HEARTBEAT_INTERVAL обновляет
+её locked_at (heartbeat). Задача без отметки дольше JOB_TIMEOUT
+считается брошенной остановившимся воркером и возвращается в очередь,
+сколько бы ни длилась сама задача.
+
+Модули задач <app>/jobs.py загружаются воркером автоматически.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Job
+
+logger = logging.getLogger('foodgram.jobs')
+
+tasks = {}
+
+
+def task(function=None, *, name=None, max_attempts=None):
+    """Регистрирует функцию как задачу очереди."""
+
+    def register(function):
+        function.task_name = name or (
+            f'{function.__module__}.{function.__qualname__}'
+        )
+        function.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        tasks[function.task_name] = function
+        return function
+
+    return register(function) if function is not None else register
+
+
+def enqueue(function, payload=None, *, priority=0, delay=0,
+            dedup_key=None, using=None):
+    """Ставит задачу (функцию @task или её имя) в очередь и возвращает
+    её Job."""
+    registered = tasks.get(getattr(function, 'task_name', function))
+    job = Job(
+        task=getattr(function, 'task_name', function),
+        payload=payload or {},
+        priority=priority,
+        dedup_key=dedup_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=(
+            registered.max_attempts if registered is not None
+            else settings.JOB_MAX_ATTEMPTS
+        ),
+    )
+    if dedup_key is None:
+        job.save(using=using)
+        return job
+    while True:
+        try:
+            with transaction.atomic(using=using):
+                job.save(using=using)
+            return job
+        except IntegrityError:
+            existing = Job.objects.using(using).filter(
+                dedup_key=dedup_key, status=Job.QUEUED
+            ).first()
+            if existing is not None:
+                return existing
+            # Задачу с этим ключом только что забрал воркер.
+            job.pk = None
+
+
+def retry_delay(attempts):
+    """Задержка перед повтором: удвоение от JOB_RETRY_BACKOFF
+    до JOB_RETRY_BACKOFF_MAX со случайным разбросом до четверти."""
+    delay = min(
+        settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.JOB_RETRY_BACKOFF_MAX,
+    )
+    return delay * random.uniform(0.75, 1.0)
+
+
+def claim(worker, limit=1):
+    """Забирает до limit готовых к запуску задач."""
+    token = f'{worker}/{uuid.uuid4().hex[:8]}'
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                status=Job.QUEUED, run_at__lte=now
+            ).order_by('-priority', 'run_at', 'id').values_list(
+                'id', flat=True
+            )[:limit]
+        )
+        if not ids:
+            return []
+        # Условие на status защищает от двойного захвата в базах без
+        # SKIP LOCKED.
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=token, locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(
+        locked_by=token, status=Job.RUNNING
+    ).order_by('-priority', 'run_at', 'id'))
+
+
+def run(job):
+    """Выполняет задачу и сохраняет результат."""
+    function = tasks.get(job.task)
+    try:
+        if function is None:
+            raise LookupError(f'Задача {job.task} не зарегистрирована')
+        function(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        retry = job.attempts < job.max_attempts and function is not None
+        logger.warning(
+            'Задача %s #%s упала (попытка %s из %s)%s', job.task, job.pk,
+            job.attempts, job.max_attempts,
+            ', будет повторена' if retry else '', exc_info=True,
+        )
+        if retry:
+            requeue(job.pk, last_error=error, run_at=timezone.now() + (
+                timedelta(seconds=retry_delay(job.attempts))
+            ))
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, last_error=error,
+                finished=timezone.now(),
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, finished=timezone.now()
+    )
+    return True
+
+
+def requeue(job_id, **fields):
+    """Возвращает выполняемую задачу в очередь."""
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+                status=Job.QUEUED, locked_by='', locked_at=None, **fields
+            )
+    except IntegrityError:
+        # В очереди уже есть задача с тем же ключом, она заменяет эту.
+        fields.pop('run_at', None)
+        Job.objects.filter(pk=job_id).update(
+            status=Job.FAILED, finished=timezone.now(), **fields
+        )
+
+
+def heartbeat(worker):
+    """Обновляет locked_at задач, выполняемых потоками воркера worker."""
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_by__startswith=f'{worker}:'
+    ).update(locked_at=timezone.now())
+
+
+def requeue_stale(timeout=None):
+    """Возвращает в очередь задачи, взятые остановившимися воркерами:
+    без heartbeat дольше timeout секунд."""
+    timeout = timeout or settings.JOB_TIMEOUT
+    stale = list(Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).values_list('id', 'attempts', 'max_attempts'))
+    error = f'Воркер не отвечал {timeout} с'
+    for job_id, attempts, max_attempts in stale:
+        if attempts < max_attempts:
+            requeue(job_id, last_error=error)
+        else:
+            Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+                status=Job.FAILED, last_error=error,
+                finished=timezone.now(),
+            )
+    return len(stale)
+
+
+def purge_finished(keep=None):
+    """Удаляет выполненные задачи старше keep секунд."""
+    keep = settings.JOB_KEEP_DONE if keep is None else keep
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        finished__lt=timezone.now() - timedelta(seconds=keep),
+    ).delete()
+    return deleted
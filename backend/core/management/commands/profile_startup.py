@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+
+
+class Command(BaseCommand):
+    """Стоимость запуска процесса по пакетам (core.startup).
+
+    Запускает цель в новом интерпретаторе с -X importtime и выводит
+    время запуска, пиковую память, собственное время импорта по
+    пакетам (приложения проекта отмечены *) и самые дорогие модули.
+    """
+
+    help = 'время импортов при запуске, сгруппированное по пакетам'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=tuple(startup.TARGETS), default='check',
+            help='setup, check (с системными проверками) или wsgi'
+        )
+        parser.add_argument(
+            '--top', type=int, default=20, help='число пакетов в отчёте'
+        )
+        parser.add_argument(
+            '--modules', type=int, default=15,
+            help='число самых дорогих модулей в отчёте'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = startup.measure(
+                options['target'], importtime=True, cwd=settings.BASE_DIR
+            )
+        except RuntimeError as error:
+            raise CommandError(f'Запуск завершился ошибкой: {error}')
+        imports = report['imports']
+        total = sum(own for _, own, _ in imports)
+        self.stdout.write(
+            f'{options["target"]}: процесс {report["wall"] * 1000:.0f} мс, '
+            f'цель {report["seconds"] * 1000:.0f} мс, '
+            f'память {report["rss"] / 2 ** 20:.1f} МБ, '
+            f'модулей {report["modules"]}, '
+            f'импорты {total / 1000:.0f} мс'
+        )
+        self.stdout.write(f'\n{"пакет":32} {"мс":>8} {"%":>6} {"модулей":>8}')
+        for name, own, count in startup.summarize(imports)[:options['top']]:
+            local = os.path.isdir(os.path.join(settings.BASE_DIR, name))
+            self.stdout.write(
+                f'{name + (" *" if local else ""):32} {own / 1000:8.1f} '
+                f'{own * 100 / (total or 1):6.1f} {count:8}'
+            )
+        self.stdout.write(
+            f'\n{"модуль":48} {"собств., мс":>12} {"с вложенными":>13}'
+        )
+        heaviest = sorted(imports, key=lambda item: item[1], reverse=True)
+        for module, own, cumulative in heaviest[:options['modules']]:
+            self.stdout.write(
+                f'{module:48} {own / 1000:12.1f} {cumulative / 1000:13.1f}'
+            )
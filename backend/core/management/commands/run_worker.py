@@ -0,0 +1,128 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils.module_loading import autodiscover_modules
+
+from core import jobs
+
+logger = logging.getLogger('foodgram.jobs')
+
+
+class Command(BaseCommand):
+    """Обработчик очереди фоновых задач (core.jobs).
+
+    Каждый из --concurrency потоков забирает по одной задаче и выполняет
+    её в своём соединении с БД; без задач поток ждёт --poll-interval.
+    Основной поток раз в JOB_HEARTBEAT_INTERVAL продлевает захват
+    выполняемых задач (jobs.heartbeat), чтобы долгие задачи не
+    считались брошенными. Раз в минуту задачи зависших воркеров
+    возвращаются в очередь, а выполненные старше JOB_KEEP_DONE
+    удаляются. SIGTERM и SIGINT дожидаются завершения текущих задач.
+    """
+
+    help = 'выполнение фоновых задач из очереди'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOB_CONCURRENCY,
+            help='число одновременно выполняемых задач'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='пауза между проверками пустой очереди, с'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='выполнить готовые задачи и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules('jobs')
+        self.stopping = threading.Event()
+        self.options = options
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        jobs.requeue_stale()
+        self.stdout.write(
+            f'Обработчик {name}: потоков {options["concurrency"]}, '
+            f'задач {len(jobs.tasks)}'
+        )
+        threads = [
+            threading.Thread(
+                target=self.work, args=(f'{name}:{number}',),
+                name=f'worker-{number}',
+            )
+            for number in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        maintained = beaten = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            if time.monotonic() - beaten > settings.JOB_HEARTBEAT_INTERVAL:
+                self.heartbeat(name)
+                beaten = time.monotonic()
+            if time.monotonic() - maintained > 60:
+                self.maintain()
+                maintained = time.monotonic()
+            for thread in threads:
+                thread.join(timeout=1)
+        connection.close()
+        self.stdout.write('Обработчик остановлен')
+
+    def stop(self, signum, frame):
+        logger.info('Остановка обработчика после текущих задач')
+        self.stopping.set()
+
+    def heartbeat(self, name):
+        try:
+            jobs.heartbeat(name)
+        except Exception:
+            logger.exception('Не удалось продлить захват задач')
+
+    def maintain(self):
+        try:
+            requeued = jobs.requeue_stale()
+            purged = jobs.purge_finished()
+        except Exception:
+            logger.exception('Обслуживание очереди завершилось ошибкой')
+            return
+        if requeued or purged:
+            logger.info(
+                'Возвращено в очередь: %s, удалено выполненных: %s',
+                requeued, purged,
+            )
+
+    def work(self, name):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    claimed = jobs.claim(name)
+                except Exception:
+                    logger.exception('Не удалось получить задачу')
+                    claimed = []
+                for job in claimed:
+                    started = time.monotonic()
+                    done = jobs.run(job)
+                    logger.info(
+                        'Задача %s #%s %s за %.0f мс', job.task, job.pk,
+                        'выполнена' if done else 'не выполнена',
+                        (time.monotonic() - started) * 1000,
+                    )
+                if claimed:
+                    continue
+                if self.options['burst']:
+                    break
+                self.stopping.wait(self.options['poll_interval'])
+        finally:
+            connection.close()
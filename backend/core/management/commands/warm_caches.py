@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import warmup
+
+
+class Command(BaseCommand):
+    """Прогрев кэшей после выкладки или перезапуска.
+
+    Повторяет анонимные запросы из WARMUP_URLS, первые страницы
+    рецептов по тегам и популярные рецепты, а с --access-log — самые
+    частые запросы из журнала доступа. Запросы выполняются тестовым
+    клиентом Django параллельно и не дольше --time-limit секунд.
+    """
+
+    help = 'прогрев кэшей частыми анонимными запросами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', default=[],
+            help='дополнительный адрес, можно указать несколько раз'
+        )
+        parser.add_argument(
+            '--access-log', default=None,
+            help='журнал доступа nginx или gunicorn для выбора адресов'
+        )
+        parser.add_argument(
+            '--top', type=int, default=100,
+            help='число самых частых адресов из журнала'
+        )
+        parser.add_argument(
+            '--top-recipes', type=int, default=settings.WARMUP_TOP_RECIPES,
+            help='число популярных рецептов'
+        )
+        parser.add_argument(
+            '--base-url', default=settings.WARMUP_BASE_URL,
+            help='адрес сайта, например https://foodgram.example'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.WARMUP_CONCURRENCY
+        )
+        parser.add_argument(
+            '--time-limit', type=float, default=settings.WARMUP_TIME_LIMIT,
+            help='ограничение времени прогрева, с'
+        )
+
+    def handle(self, *args, **options):
+        urls = options['url'] + warmup.hot_urls(options['top_recipes'])
+        if options['access_log']:
+            try:
+                with open(options['access_log'], encoding='utf8',
+                          errors='replace') as log:
+                    urls = warmup.log_urls(log, options['top']) + urls
+            except OSError as error:
+                raise CommandError(f'Журнал недоступен: {error}')
+        urls = list(dict.fromkeys(urls))
+        started = time.monotonic()
+        results = warmup.replay(
+            urls, options['base_url'], options['concurrency'],
+            options['time_limit'],
+        )
+        for url, status in results.items():
+            if status != 200 or options['verbosity'] > 1:
+                self.stdout.write(f'{status or "пропущен"} {url}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето {sum(s == 200 for s in results.values())} '
+            f'из {len(results)} адресов '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+
+from core.constants import (PRIMARY_PIN_COOKIE, QUERY_COUNT_BUCKETS,
+                            QUERY_SHAPE_LOG_LENGTH)
+from core.instrumentation import RequestStats, current_stats, execute_wrappers
+from core.metrics import registry
+from core.routers import read_from_replica
+
+logger = logging.getLogger('foodgram.requests')
+
+REQUEST_DURATION = registry.histogram(
+    'foodgram_request_duration_seconds',
+    'Полное время обработки запроса', ('view', 'method'),
+)
+VIEW_DURATION = registry.histogram(
+    'foodgram_view_duration_seconds',
+    'Время работы представления с рендерингом ответа', ('view', 'method'),
+)
+DB_DURATION = registry.histogram(
+    'foodgram_db_duration_seconds',
+    'Суммарное время SQL-запросов за запрос', ('view', 'method'),
+)
+SERIALIZER_DURATION = registry.histogram(
+    'foodgram_serializer_duration_seconds',
+    'Время сериализации ответа', ('view', 'method'),
+)
+QUERY_COUNT = registry.histogram(
+    'foodgram_db_queries', 'Число SQL-запросов за запрос',
+    ('view', 'method'), buckets=QUERY_COUNT_BUCKETS,
+)
+N_PLUS_ONE = registry.counter(
+    'foodgram_n_plus_one_total',
+    'Запросы с повторяющимися одинаковыми SQL-запросами', ('view',),
+)
+RESPONSES = registry.counter(
+    'foodgram_responses_total', 'Ответы по статусам',
+    ('view', 'method', 'status'),
+)
+READ_TARGET = registry.counter(
+    'foodgram_db_read_target_total',
+    'Безопасные запросы по базе для чтения', ('target',),
+)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestInstrumentationMiddleware(MiddlewareMixin):
+    """Замеры SQL-запросов и времени обработки каждого запроса.
+
+    Включается настройкой REQUEST_INSTRUMENTATION. Результаты
+    попадают в заголовок Server-Timing, в лог foodgram.requests
+    и в гистограммы по представлениям на /api/_metrics.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            with execute_wrappers(stats.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, stats)
+        return response
+
+    async def acall(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            with execute_wrappers(stats.execute_wrapper):
+                response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.record(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_stats.get()
+        if stats is not None:
+            stats.view_started = time.perf_counter()
+
+    def record(self, request, response, stats):
+        finished = time.perf_counter()
+        total = finished - stats.started
+        view_time = finished - getattr(stats, 'view_started', finished)
+        serializer_time = stats.timings.get('serializer', 0.0)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        labels = {'view': view, 'method': request.method}
+        REQUEST_DURATION.observe(total, **labels)
+        VIEW_DURATION.observe(view_time, **labels)
+        DB_DURATION.observe(stats.db_time, **labels)
+        SERIALIZER_DURATION.observe(serializer_time, **labels)
+        QUERY_COUNT.observe(stats.query_count, **labels)
+        RESPONSES.inc(status=response.status_code, **labels)
+        repeated = stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD)
+        if repeated:
+            N_PLUS_ONE.inc(view=view)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={stats.db_time * 1000:.1f};'
+            f'desc="{stats.query_count} queries"',
+            f'ser;dur={serializer_time * 1000:.1f}',
+            f'view;dur={view_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        log = logger.warning if repeated else logger.info
+        log(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            'queries': stats.query_count,
+            'db_ms': round(stats.db_time * 1000, 1),
+            'serializer_ms': round(serializer_time * 1000, 1),
+            'view_ms': round(view_time * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'n_plus_one': [
+                {'shape': shape[:QUERY_SHAPE_LOG_LENGTH], 'count': count}
+                for shape, count in repeated
+            ],
+        }, ensure_ascii=False))
+
+
+class ReadReplicaMiddleware(MiddlewareMixin):
+    """Чтение с реплик для безопасных запросов.
+
+    Клиент, только что изменивший данные, на PRIMARY_PIN_SECONDS
+    закрепляется за основной базой и видит свои изменения, несмотря
+    на отставание реплик. Закрепление хранится в cookie и, для
+    клиентов с заголовком Authorization, в кэше.
+
+    Представления с атрибутом read_only (пакетный запрос /api/batch/)
+    считаются безопасными при любом методе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        request.read_only = request.method in SAFE_METHODS
+        token = read_from_replica.set(False)
+        try:
+            if request.read_only:
+                self.route_reads(request)
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if not request.read_only and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    async def acall(self, request):
+        request.read_only = request.method in SAFE_METHODS
+        token = read_from_replica.set(False)
+        try:
+            if request.read_only:
+                self.read_from(
+                    not await sync_to_async(self.pinned)(request)
+                )
+            response = await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if not request.read_only and response.status_code < 400:
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'read_only', False) and not request.read_only:
+            request.read_only = True
+            self.route_reads(request)
+
+    def route_reads(self, request):
+        self.read_from(not self.pinned(request))
+
+    @staticmethod
+    def read_from(replica):
+        READ_TARGET.inc(target='replica' if replica else 'primary')
+        read_from_replica.set(replica)
+
+    @staticmethod
+    def pin_key(request):
+        authorization = request.headers.get('Authorization')
+        if not authorization:
+            return None
+        digest = hashlib.sha256(authorization.encode()).hexdigest()
+        return f'replica:pin:{digest}'
+
+    def pinned(self, request):
+        try:
+            expires = float(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0))
+        except ValueError:
+            expires = 0
+        if expires > time.time():
+            return True
+        key = self.pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def pin(self, request, response):
+        seconds = settings.PRIMARY_PIN_SECONDS
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE, int(time.time() + seconds) + 1,
+            max_age=seconds + 1, httponly=True, samesite='Lax',
+        )
+        key = self.pin_key(request)
+        if key is not None:
+            cache.set(key, True, seconds)
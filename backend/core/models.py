@@ -0,0 +1,113 @@
+import os
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class ProfileReport(models.Model):
+    """Профиль отдельного запроса и его файлы в PROFILING_DIR."""
+
+    PATH_LENGTH = 500
+    TRIGGERS = (
+        ('flag', 'По запросу сотрудника'),
+        ('sample', 'Выборочно'),
+    )
+
+    created = models.DateTimeField('Создан', auto_now_add=True)
+    method = models.CharField('Метод', max_length=10)
+    path = models.CharField('Адрес', max_length=PATH_LENGTH)
+    view = models.CharField('Представление', max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField('Статус ответа')
+    duration_ms = models.FloatField('Длительность, мс')
+    trigger = models.CharField('Причина', max_length=10, choices=TRIGGERS)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Пользователь'
+    )
+    stats_file = models.CharField('Файл pstats', max_length=100)
+    collapsed_file = models.CharField('Файл стеков', max_length=100)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
+
+    def file_path(self, name):
+        return os.path.join(settings.PROFILING_DIR, name)
+
+    def delete(self, *args, **kwargs):
+        for name in (self.stats_file, self.collapsed_file):
+            try:
+                os.remove(self.file_path(name))
+            except FileNotFoundError:
+                pass
+        return super().delete(*args, **kwargs)
+
+
+class Job(models.Model):
+    """Фоновая задача очереди core.jobs."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    payload = models.JSONField('Параметры', default=dict, blank=True)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    priority = models.SmallIntegerField(
+        'Приоритет', default=0, help_text='Больше — раньше'
+    )
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, null=True, blank=True
+    )
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Максимум попыток')
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('dedup_key',),
+                condition=Q(status='queued'),
+                name='job_queued_dedup_key'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('-priority', 'run_at'),
+                condition=Q(status='queued'),
+                name='job_queued'
+            ),
+            models.Index(
+                fields=('status', 'locked_at'), name='job_status_locked'
+            ),
+        ]
+        ordering = ('-created',)
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
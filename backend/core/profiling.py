@@ -0,0 +1,216 @@
+"""Профилирование отдельных запросов.
+
+Профиль снимается по флагу (заголовок X-Profile или параметр
+?_profile=1) либо выборочно с вероятностью PROFILING_SAMPLE_RATE;
+выборочный профиль сохраняется, только если запрос выполнялся дольше
+PROFILING_SLOW_MS.
+
+Флаг действует, только если до начала профилирования известно, что
+его прислал сотрудник (сессия или заголовок Authorization), или
+заголовок X-Profile равен PROFILING_TOKEN. Остальные флаги
+игнорируются без затрат на профилировщик.
+
+Под ASGI профиль снимается с потока цикла событий: в него попадают
+одновременно выполнявшиеся запросы, но не код в потоках sync_to_async.
+"""
+import cProfile
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.crypto import constant_time_compare
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+from core.models import ProfileReport
+
+logger = logging.getLogger('foodgram.profiling')
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+
+
+class StackSampler(threading.Thread):
+    """Статистический профилировщик одного потока.
+
+    Периодически снимает стек целевого потока и считает одинаковые
+    стеки - результат в формате collapsed stacks для flamegraph.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f'{frame.f_globals.get("__name__", "?")}:'
+                    f'{code.co_name}:{frame.f_lineno}'
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(
+            f'{stack} {count}\n'
+            for stack, count in self.stacks.most_common()
+        )
+
+
+class RequestProfile:
+    """cProfile и StackSampler текущего потока на время блока."""
+
+    def __init__(self, interval):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.duration = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """Снимает cProfile и collapsed stacks для выбранных запросов."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        requested = flagged(request) and profiling_allowed(request)
+        if not requested and not sampled():
+            return self.get_response(request)
+        with RequestProfile(settings.PROFILING_INTERVAL) as profile:
+            response = self.get_response(request)
+        return self.report(request, response, profile, requested)
+
+    async def acall(self, request):
+        requested = flagged(request) and await sync_to_async(
+            profiling_allowed
+        )(request)
+        if not requested and not sampled():
+            return await self.get_response(request)
+        with RequestProfile(settings.PROFILING_INTERVAL) as profile:
+            response = await self.get_response(request)
+        return await sync_to_async(self.report)(
+            request, response, profile, requested
+        )
+
+    @staticmethod
+    def report(request, response, profile, requested):
+        """Сохраняет профиль запроса по флагу или медленного выборочного
+        и добавляет в ответ заголовок X-Profile-Id."""
+        if requested:
+            trigger = 'flag'
+        elif profile.duration * 1000 < settings.PROFILING_SLOW_MS:
+            return response
+        else:
+            trigger = 'sample'
+        try:
+            report = save_report(
+                request, response, profile.profiler, profile.sampler,
+                profile.duration, trigger,
+            )
+        except OSError:
+            logger.exception('Не удалось сохранить профиль запроса')
+            return response
+        response['X-Profile-Id'] = str(report.pk)
+        return response
+
+
+def flagged(request):
+    return PROFILE_HEADER in request.headers or PROFILE_PARAM in request.GET
+
+
+def sampled():
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def profiling_allowed(request):
+    """Можно ли профилировать запрос по флагу: PROFILING_TOKEN в
+    заголовке X-Profile или учётные данные сотрудника."""
+    token = settings.PROFILING_TOKEN
+    if token and constant_time_compare(
+            request.headers.get(PROFILE_HEADER, ''), token
+    ):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    if 'Authorization' not in request.headers:
+        return False
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+def save_report(request, response, profiler, sampler, duration, trigger):
+    """Сохраняет артефакты профиля и запись о нём, соблюдая лимит."""
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    stats_file = f'{name}.pstats'
+    collapsed_file = f'{name}.collapsed'
+    profiler.dump_stats(os.path.join(directory, stats_file))
+    with open(
+            os.path.join(directory, collapsed_file), 'w', encoding='utf8'
+    ) as file:
+        file.write(sampler.collapsed())
+    match = request.resolver_match
+    user = getattr(request, 'user', None)
+    report = ProfileReport.objects.create(
+        method=request.method,
+        path=request.get_full_path()[:ProfileReport.PATH_LENGTH],
+        view=match.view_name if match else '',
+        status=response.status_code,
+        duration_ms=round(duration * 1000, 1),
+        trigger=trigger,
+        user=user if user and user.is_authenticated else None,
+        stats_file=stats_file,
+        collapsed_file=collapsed_file,
+    )
+    prune_reports(settings.PROFILING_MAX_REPORTS)
+    return report
+
+
+def prune_reports(limit):
+    """Удаляет самые старые профили сверх limit вместе с файлами."""
+    for report in ProfileReport.objects.order_by('-created')[limit:]:
+        report.delete()
@@ -0,0 +1,48 @@
+"""Маршрутизация чтения на реплики БД.
+
+Запись всегда идёт в основную базу (default). Чтение уходит на реплику
+из DATABASE_REPLICAS только внутри безопасного (GET/HEAD/OPTIONS)
+запроса, отмеченного ReadReplicaMiddleware; команды, воркеры и
+изменяющие запросы читают из основной базы и видят свои же записи.
+
+Для проверки без PostgreSQL достаточно двух баз SQLite:
+DATABASES = {'default': {... 'NAME': 'primary.sqlite3'},
+'replica': {... 'NAME': 'replica.sqlite3'}} и DATABASE_REPLICAS =
+['replica'].
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_alias():
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not read_from_replica.get():
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,285 @@
+"""Адаптивное ограничение параллельных запросов и сброс нагрузки.
+
+Каждый запрос относится к классу приоритета по имени представления
+(LOAD_SHEDDING_PRIORITIES): critical — дешёвые и нужные всем (теги,
+рецепт, вход), low — тяжёлые (список покупок, подписки, глубокие
+страницы списков), остальные — normal. Процесс держит общий предел
+одновременных запросов. Пока предел на потолке LOAD_SHEDDING_MAX_LIMIT
+(выше числа потоков воркера), запросы допускаются все: при здоровой
+базе ничего не сбрасывается. Когда предел снижен, класс допускается,
+пока запросов в работе меньше его доли предела (LOAD_SHEDDING_SHARES),
+иначе сразу получает 503 с Retry-After.
+
+Предел меняется по AIMD: запрос, время SQL которого уложилось в цель
+класса (LOAD_SHEDDING_DB_TARGETS), увеличивает предел на 1/предел,
+превысивший цель — опускает его до числа запросов в работе, умноженного
+на LOAD_SHEDDING_BACKOFF, но не чаще раза в
+LOAD_SHEDDING_DECREASE_INTERVAL. Когда база замедляется,
+предел падает и первыми отсекаются тяжёлые запросы, а дешёвые
+продолжают обслуживаться: critical допускается, пока запросов в
+работе меньше LOAD_SHEDDING_CRITICAL_FLOOR, как бы ни упал предел.
+Метрики (LOAD_SHEDDING_EXEMPT) и админка не ограничиваются и не
+учитываются. Пакетный запрос (представление с атрибутом
+limits_subrequests) middleware тоже пропускает: каждый подзапрос
+занимает место под своим приоритетом (limited), а пакет целиком
+отклоняется, если предел не допускает худший класс подзапросов.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+
+from core.instrumentation import execute_wrappers
+from core.metrics import registry
+
+PRIORITIES = ('critical', 'normal', 'low')
+SHED_DETAIL = 'Сервер перегружен, повторите запрос позже.'
+
+SHED_REQUESTS = registry.counter(
+    'foodgram_requests_shed_total',
+    'Запросы, отклонённые при перегрузке', ('priority',),
+)
+
+
+class AIMDLimiter:
+    """Предел одновременных запросов с приоритетными долями."""
+
+    def __init__(self, min_limit, max_limit, shares, targets, backoff,
+                 decrease_interval, critical_floor=0, smoothing=0.2):
+        self.min_limit = min_limit
+        self.critical_floor = critical_floor
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.shares = shares
+        self.targets = targets
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self.smoothing = smoothing
+        self.in_flight = dict.fromkeys(PRIORITIES, 0)
+        self.db_latency = dict.fromkeys(PRIORITIES, 0.0)
+        self.decreased = 0.0
+        self.lock = threading.Lock()
+
+    def admits(self, priority):
+        """Есть ли сейчас место для запроса класса priority.
+
+        Вне acquire — оценка без блокировки.
+        """
+        if self.limit >= self.max_limit:
+            return sum(self.in_flight.values()) < self.max_limit
+        allowed = max(self.limit * self.shares[priority], self.min_limit)
+        if priority == 'critical':
+            allowed = max(allowed, self.critical_floor)
+        return sum(self.in_flight.values()) < allowed
+
+    def acquire(self, priority):
+        """Занимает место для запроса класса priority, если есть."""
+        with self.lock:
+            if not self.admits(priority):
+                return False
+            self.in_flight[priority] += 1
+            return True
+
+    def release(self, priority, db_time, failed=False):
+        """Освобождает место и подстраивает предел по времени SQL."""
+        now = time.monotonic()
+        with self.lock:
+            in_flight = sum(self.in_flight.values())
+            self.in_flight[priority] -= 1
+            self.db_latency[priority] += self.smoothing * (
+                db_time - self.db_latency[priority]
+            )
+            if failed or db_time > self.targets[priority]:
+                if now - self.decreased >= self.decrease_interval:
+                    # С потолка, намного выше числа потоков, предел
+                    # сразу опускается к реальной нагрузке.
+                    self.limit = max(
+                        min(self.limit, in_flight) * self.backoff,
+                        self.min_limit,
+                    )
+                    self.decreased = now
+            else:
+                self.limit = min(
+                    self.limit + 1 / self.limit, self.max_limit
+                )
+
+    def samples(self):
+        with self.lock:
+            return {
+                'limit': self.limit,
+                'in_flight': dict(self.in_flight),
+                'db_latency': dict(self.db_latency),
+            }
+
+
+@lru_cache(maxsize=None)
+def process_limiter():
+    """Предел процесса, общий для всех экземпляров middleware."""
+    limiter = AIMDLimiter(
+        min_limit=settings.LOAD_SHEDDING_MIN_LIMIT,
+        max_limit=settings.LOAD_SHEDDING_MAX_LIMIT,
+        shares=settings.LOAD_SHEDDING_SHARES,
+        targets=settings.LOAD_SHEDDING_DB_TARGETS,
+        backoff=settings.LOAD_SHEDDING_BACKOFF,
+        decrease_interval=settings.LOAD_SHEDDING_DECREASE_INTERVAL,
+        critical_floor=settings.LOAD_SHEDDING_CRITICAL_FLOOR,
+    )
+    registry.gauge(
+        'foodgram_concurrency_limit',
+        'Текущий адаптивный предел одновременных запросов',
+        callback=lambda: [({}, limiter.samples()['limit'])],
+    )
+    registry.gauge(
+        'foodgram_requests_in_flight',
+        'Запросы в работе по приоритетам', ('priority',),
+        callback=lambda: [
+            ({'priority': priority}, count) for priority, count
+            in limiter.samples()['in_flight'].items()
+        ],
+    )
+    registry.gauge(
+        'foodgram_db_latency_ewma_seconds',
+        'Сглаженное время SQL за запрос по приоритетам', ('priority',),
+        callback=lambda: [
+            ({'priority': priority}, latency) for priority, latency
+            in limiter.samples()['db_latency'].items()
+        ],
+    )
+    return limiter
+
+
+class DatabaseTimer:
+    """Обёртка execute_wrapper, суммирующая время SQL-запросов."""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += time.perf_counter() - started
+
+
+@lru_cache(maxsize=None)
+def priority_names():
+    """Класс приоритета по имени представления."""
+    return {
+        name: priority
+        for priority, names in settings.LOAD_SHEDDING_PRIORITIES.items()
+        for name in names
+    }
+
+
+def request_priority(request):
+    """Класс приоритета запроса или None, если он не ограничивается."""
+    match = request.resolver_match
+    if match is None:
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return 'normal'
+    if match.url_name in settings.LOAD_SHEDDING_EXEMPT or (
+        'admin' in match.namespaces
+        or getattr(match.func, 'limits_subrequests', False)
+    ):
+        return None
+    priority = priority_names().get(match.url_name, 'normal')
+    if priority != 'critical' and deep_page(request):
+        return 'low'
+    return priority
+
+
+def worst_priority(priorities):
+    """Самый низкий класс из priorities, None не учитывается."""
+    return max(
+        (priority for priority in priorities if priority is not None),
+        key=PRIORITIES.index, default=None,
+    )
+
+
+def deep_page(request):
+    try:
+        page = int(request.GET.get('page', 1))
+        offset = int(request.GET.get('offset', 0))
+    except ValueError:
+        return False
+    return (
+        page > settings.LOAD_SHEDDING_DEEP_PAGE
+        or offset > settings.LOAD_SHEDDING_DEEP_OFFSET
+    )
+
+
+def shed(priority):
+    """Ответ 503 на отклонённый запрос класса priority."""
+    SHED_REQUESTS.inc(priority=priority)
+    response = JsonResponse({'detail': SHED_DETAIL}, status=503)
+    response['Retry-After'] = str(
+        settings.LOAD_SHEDDING_RETRY_AFTER[priority]
+    )
+    return response
+
+
+def limited(priority, call):
+    """Ответ call() на месте класса priority в пределе процесса.
+
+    Возвращает None, если места нет. Время SQL внутри call подстраивает
+    предел, ответ 5xx или исключение считаются перегрузкой.
+    """
+    limiter = process_limiter()
+    if not limiter.acquire(priority):
+        return None
+    timer = DatabaseTimer()
+    failed = True
+    try:
+        with execute_wrappers(timer):
+            response = call()
+        failed = response.status_code >= 500
+        return response
+    finally:
+        limiter.release(priority, timer.total, failed)
+
+
+class LoadSheddingMiddleware(MiddlewareMixin):
+    """Сброс нагрузки по приоритетам с адаптивным пределом (см. модуль).
+
+    Включается настройкой LOAD_SHEDDING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.limiter = process_limiter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.acall(request)
+        priority = request_priority(request)
+        if priority is None:
+            return self.get_response(request)
+        response = limited(priority, lambda: self.get_response(request))
+        return shed(priority) if response is None else response
+
+    async def acall(self, request):
+        priority = request_priority(request)
+        if priority is None:
+            return await self.get_response(request)
+        if not self.limiter.acquire(priority):
+            return shed(priority)
+        timer = DatabaseTimer()
+        failed = True
+        try:
+            with execute_wrappers(timer):
+                response = await self.get_response(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self.limiter.release(priority, timer.total, failed)
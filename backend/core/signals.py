@@ -0,0 +1,21 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core.instrumentation import dispatch_execute
+from core.metrics import registry
+
+CONNECTIONS_CREATED = registry.counter(
+    'foodgram_db_connections_total',
+    'Подключения Django к БД (новые или взятые из пула)', ('alias',),
+)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    CONNECTIONS_CREATED.inc(alias=connection.alias)
+
+
+@receiver(connection_created)
+def install_execute_dispatch(sender, connection, **kwargs):
+    if dispatch_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_execute)
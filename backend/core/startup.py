@@ -0,0 +1,119 @@
+"""Замер запуска процесса Django: время, память и стоимость импортов.
+
+Каждый замер идёт в новом интерпретаторе, иначе модули уже загружены.
+Цели соответствуют типичным запускам:
+
+    setup — django.setup(): команды manage.py без системных проверок;
+    check — плюс системные проверки, они загружают URLconf со всеми
+            представлениями: migrate и большинство команд;
+    wsgi  — WSGI-приложение с middleware и URLconf: воркер gunicorn.
+
+С importtime процесс запускается с -X importtime, время импорта
+каждого модуля (собственное, без вложенных) суммируется по пакетам:
+приложения проекта, сторонние пакеты и стандартная библиотека.
+"""
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import sysconfig
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+TARGETS = {
+    'setup': 'import django\ndjango.setup()\n',
+    'check': (
+        'import django\ndjango.setup()\n'
+        'from django.core import checks\nchecks.run_checks()\n'
+    ),
+    'wsgi': (
+        'from django.core.wsgi import get_wsgi_application\n'
+        'application = get_wsgi_application()\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+}
+
+CHILD = '''import time
+started = time.perf_counter()
+{target}
+import json, resource, sys
+print(json.dumps({{
+    'seconds': time.perf_counter() - started,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    'modules': len(sys.modules),
+}}))
+'''
+
+IMPORT_TIME = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+STDLIB = sysconfig.get_paths()['stdlib']
+
+
+def measure(target, importtime=False, cwd=None):
+    """Запускает цель в новом интерпретаторе.
+
+    Возвращает полное время запуска процесса (wall), время самой цели
+    (seconds), пиковую память (rss, байт), число модулей и, с
+    importtime, список (модуль, собственное время, с вложенными, мкс).
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', CHILD.format(target=TARGETS[target])]
+    started = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=cwd, env=os.environ.copy(), capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall'] = wall
+    report['imports'] = [
+        (match[4], int(match[1]), int(match[2]))
+        for match in map(IMPORT_TIME.match, result.stderr.splitlines())
+        if match
+    ] if importtime else []
+    return report
+
+
+@lru_cache(maxsize=None)
+def package_group(top):
+    """Пакет верхнего уровня или stdlib для стандартной библиотеки."""
+    stdlib_names = getattr(sys, 'stdlib_module_names', None)
+    if top in sys.builtin_module_names or (
+        stdlib_names is not None and top in stdlib_names
+    ):
+        return 'stdlib'
+    try:
+        spec = importlib.util.find_spec(top)
+    except (ImportError, ValueError):
+        spec = None
+    origin = ''
+    if spec is not None:
+        origin = spec.origin or next(
+            iter(spec.submodule_search_locations or ()), ''
+        )
+    if stdlib_names is None and origin.startswith(STDLIB) and (
+        'site-packages' not in origin
+    ):
+        return 'stdlib'
+    return top
+
+
+def summarize(imports):
+    """Собственное время импорта и число модулей по пакетам,
+    по убыванию времени."""
+    groups = defaultdict(lambda: [0, 0])
+    for module, own, _ in imports:
+        group = groups[package_group(module.partition('.')[0])]
+        group[0] += own
+        group[1] += 1
+    return sorted(
+        ((name, own, count) for name, (own, count) in groups.items()),
+        key=lambda item: item[1], reverse=True,
+    )
@@ -0,0 +1,71 @@
+from unittest import mock, skipIf
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import counts
+from core.cache import tagged_cache
+from recipes.models import Tag
+
+
+@override_settings(PAGINATION_ESTIMATE_THRESHOLD=100)
+class CountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.bulk_create(
+            Tag(name=f'Тег {number}', slug=f'tag-{number}')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_large_estimate_is_returned_as_is(self):
+        with mock.patch.object(counts, 'estimate', return_value=5000):
+            self.assertEqual(counts.compute(Tag.objects.all()), (5000, False))
+
+    def test_small_estimate_is_counted_exactly(self):
+        with mock.patch.object(counts, 'estimate', return_value=99):
+            self.assertEqual(counts.compute(Tag.objects.all()), (3, True))
+
+    def test_missing_estimate_is_counted_exactly(self):
+        with mock.patch.object(counts, 'estimate', return_value=None):
+            self.assertEqual(counts.compute(Tag.objects.all()), (3, True))
+
+    @skipIf(connection.vendor == 'postgresql', 'оценка доступна')
+    def test_other_databases_have_no_estimate(self):
+        self.assertIsNone(counts.estimate(Tag.objects.all()))
+
+    def test_empty_filter_is_zero_without_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                counts.count(Tag.objects.filter(pk__in=[])), (0, True)
+            )
+
+    def test_tagged_count_is_cached_until_tag_changes(self):
+        queryset = Tag.objects.all()
+        self.assertEqual(counts.count(queryset, ['tags']), (3, True))
+        Tag.objects.create(name='Новый', slug='new')
+        self.assertEqual(counts.count(queryset, ['tags']), (3, True))
+        tagged_cache.invalidate('tags')
+        self.assertEqual(counts.count(queryset, ['tags']), (4, True))
+
+
+class SettleTests(SimpleTestCase):
+
+    def test_exact_count_is_kept(self):
+        self.assertEqual(counts.settle(7, True, 0, 3, 10), (7, True))
+
+    def test_partial_page_gives_exact_count(self):
+        self.assertEqual(counts.settle(5000, False, 20, 4, 10), (24, True))
+
+    def test_full_page_gives_lower_bound(self):
+        self.assertEqual(counts.settle(15, False, 20, 11, 10), (31, False))
+        self.assertEqual(
+            counts.settle(5000, False, 20, 11, 10), (5000, False)
+        )
+
+    def test_empty_page_gives_upper_bound(self):
+        self.assertEqual(counts.settle(5000, False, 40, 0, 10), (40, False))
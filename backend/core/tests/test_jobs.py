@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+WORKER = 'host:1'
+
+
+class StaleJobTests(TestCase):
+
+    def setUp(self):
+        self.job = jobs.enqueue('core.tests.missing')
+
+    def claim(self):
+        claimed = jobs.claim(f'{WORKER}:0')
+        self.assertEqual([job.pk for job in claimed], [self.job.pk])
+        return claimed[0]
+
+    def stall(self, seconds):
+        Job.objects.filter(pk=self.job.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def test_job_without_heartbeat_is_requeued(self):
+        self.claim()
+        self.stall(120)
+        self.assertEqual(jobs.requeue_stale(timeout=60), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.QUEUED)
+        self.assertEqual(self.job.locked_by, '')
+        self.assertIsNone(self.job.locked_at)
+        self.assertIn('60', self.job.last_error)
+        self.assertEqual(self.claim().attempts, 2)
+
+    def test_heartbeat_keeps_long_job(self):
+        self.claim()
+        self.stall(120)
+        self.assertEqual(jobs.heartbeat(WORKER), 1)
+        self.assertEqual(jobs.requeue_stale(timeout=60), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.RUNNING)
+
+    def test_heartbeat_of_other_worker_does_not_count(self):
+        self.claim()
+        self.stall(120)
+        self.assertEqual(jobs.heartbeat('host:2'), 0)
+        self.assertEqual(jobs.requeue_stale(timeout=60), 1)
+
+    def test_recent_job_is_not_requeued(self):
+        self.claim()
+        self.stall(30)
+        self.assertEqual(jobs.requeue_stale(timeout=60), 0)
+
+    def test_stale_job_out_of_attempts_fails(self):
+        Job.objects.filter(pk=self.job.pk).update(max_attempts=1)
+        self.claim()
+        self.stall(120)
+        self.assertEqual(jobs.requeue_stale(timeout=60), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.FAILED)
+        self.assertIsNotNone(self.job.finished)
+        self.assertEqual(jobs.claim(f'{WORKER}:0'), [])
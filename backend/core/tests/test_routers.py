@@ -0,0 +1,108 @@
+import time
+
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.constants import PRIMARY_PIN_COOKIE
+from core.middleware import ReadReplicaMiddleware
+from core.routers import ReplicaRouter, read_from_replica
+from recipes.models import Recipe
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def read_in_request(self, **hints):
+        token = read_from_replica.set(True)
+        try:
+            return self.router.db_for_read(Recipe, **hints)
+        finally:
+            read_from_replica.reset(token)
+
+    def test_reads_outside_request_go_to_primary(self):
+        self.assertEqual(
+            self.router.db_for_read(Recipe), DEFAULT_DB_ALIAS
+        )
+
+    def test_reads_in_safe_request_go_to_replica(self):
+        self.assertEqual(self.read_in_request(), 'replica')
+
+    def test_related_reads_follow_instance_database(self):
+        recipe = Recipe()
+        recipe._state.db = DEFAULT_DB_ALIAS
+        self.assertEqual(
+            self.read_in_request(instance=recipe), DEFAULT_DB_ALIAS
+        )
+
+    def test_writes_go_to_primary(self):
+        token = read_from_replica.set(True)
+        try:
+            self.assertEqual(
+                self.router.db_for_write(Recipe), DEFAULT_DB_ALIAS
+            )
+        finally:
+            read_from_replica.reset(token)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'recipes'))
+        self.assertIsNone(
+            self.router.allow_migrate(DEFAULT_DB_ALIAS, 'recipes')
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        self.assertEqual(self.read_in_request(), DEFAULT_DB_ALIAS)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadReplicaMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def get_response(self, request):
+        self.reads.append(read_from_replica.get())
+        return HttpResponse(status=getattr(request, 'status', 200))
+
+    def call(self, request):
+        return ReadReplicaMiddleware(self.get_response)(request)
+
+    def test_get_reads_replica(self):
+        response = self.call(self.factory.get('/api/recipes/'))
+        self.assertEqual(self.reads, [True])
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_write_reads_primary_and_sets_pin_cookie(self):
+        response = self.call(self.factory.post('/api/recipes/'))
+        self.assertEqual(self.reads, [False])
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertGreater(
+            int(response.cookies[PRIMARY_PIN_COOKIE].value), time.time()
+        )
+
+    def test_failed_write_does_not_pin(self):
+        request = self.factory.post('/api/recipes/')
+        request.status = 400
+        response = self.call(request)
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_pinned_client_reads_primary(self):
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = str(int(time.time()) + 5)
+        self.call(request)
+        self.assertEqual(self.reads, [False])
+
+    def test_expired_pin_reads_replica(self):
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = str(int(time.time()) - 1)
+        self.call(request)
+        self.assertEqual(self.reads, [True])
+
+    def test_context_is_reset_after_request(self):
+        self.call(self.factory.get('/api/recipes/'))
+        self.assertFalse(read_from_replica.get())
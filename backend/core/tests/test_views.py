@@ -0,0 +1,43 @@
+from django.test import TestCase, override_settings
+
+from users.models import User
+
+METRICS_URL = '/api/_metrics'
+
+
+class MetricsAccessTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            username='staff', email='staff@example.com', password='secret',
+            is_staff=True,
+        )
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='secret',
+        )
+
+    @override_settings(METRICS_TOKEN='')
+    def test_hidden_without_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 404)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_staff_without_token(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(METRICS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer scrape'
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from core.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Доступны сотрудникам, вошедшим через админку, и по заголовку
+    Authorization: Bearer METRICS_TOKEN. Без METRICS_TOKEN остальным
+    адрес отвечает 404.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        if not settings.METRICS_TOKEN:
+            raise Http404
+        if not constant_time_compare(
+                request.headers.get('Authorization', ''),
+                f'Bearer {settings.METRICS_TOKEN}'
+        ):
+            return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
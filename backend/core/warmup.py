@@ -0,0 +1,201 @@
+"""Прогрев приложения перед приёмом запросов.
+
+Этап master выполняется один раз в мастер-процессе gunicorn при
+preload_app: всё загруженное здесь разделяется воркерами через
+copy-on-write. Этап worker выполняется в каждом воркере до начала
+приёма соединений.
+
+Прогрев кэшей (warm_caches и одноимённая команда) повторяет частые
+анонимные запросы через тестовый клиент Django, чтобы первые
+пользователи после выкладки не ждали пустых кэшей.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('foodgram.warmup')
+
+
+def import_api():
+    """Импорт сериализаторов, представлений и построение URL-резолвера."""
+    from django.urls import get_resolver
+
+    import api.serializers  # noqa: F401
+    import api.views  # noqa: F401
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver._populate()
+
+
+def prime_content_types():
+    """Кэш ContentType, нужный админке и правам доступа."""
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+def fill_pools():
+    """Открывает WARMUP_DB_CONNECTIONS соединений в пулах процесса
+    (DB_POOL), чтобы первые запросы их не ждали.
+
+    Соединения Django привязаны к потоку, поэтому открытые в главном
+    потоке воркера потокам запросов не достались бы. Здесь они
+    открываются одновременно в отдельных потоках и при закрытии
+    возвращаются в общий пул, из которого их берут потоки запросов.
+    Без пула шаг ничего не делает.
+    """
+    from django.db import connections
+
+    pooled = [
+        connection for connection in connections.all()
+        if hasattr(connection, 'pool')
+    ]
+    if not pooled:
+        return
+    count = min(
+        settings.WARMUP_DB_CONNECTIONS,
+        *(connection.pool.max_size for connection in pooled),
+    )
+    # Все соединения держатся до барьера, иначе следующий поток взял
+    # бы из пула только что возвращённое.
+    barrier = threading.Barrier(count)
+
+    def open_and_return(_):
+        try:
+            for connection in pooled:
+                connections[connection.alias].ensure_connection()
+        except Exception:
+            barrier.abort()
+            raise
+        finally:
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+            connections.close_all()
+
+    with ThreadPoolExecutor(count) as executor:
+        list(executor.map(open_and_return, range(count)))
+
+
+def close_connections():
+    """Закрывает соединения перед fork: их нельзя делить с воркерами."""
+    from django.db import connections
+
+    from core.db.pool import pools
+
+    connections.close_all()
+    for pool in list(pools.values()):
+        pool.close_all()
+
+
+def hot_urls(top_recipes=None):
+    """WARMUP_URLS, первые страницы рецептов со всеми тегами и по
+    каждому тегу (как их запрашивает фронтенд) и самые популярные
+    рецепты."""
+    from django.db.models import Count
+
+    from foodgram.constants import PAGE_PAGINATION_SIZE
+    from recipes.models import Recipe, Tag
+
+    if top_recipes is None:
+        top_recipes = settings.WARMUP_TOP_RECIPES
+    urls = list(settings.WARMUP_URLS)
+    slugs = list(Tag.objects.order_by('id').values_list('slug', flat=True))
+    page = {'page': 1, 'limit': PAGE_PAGINATION_SIZE}
+    urls.append('/api/recipes/?' + urlencode(
+        [*page.items(), *(('tags', slug) for slug in slugs)]
+    ))
+    urls.extend(
+        '/api/recipes/?' + urlencode({**page, 'tags': slug})
+        for slug in slugs
+    )
+    urls.extend(
+        f'/api/recipes/{pk}/' for pk in Recipe.objects.annotate(
+            favorites=Count('favorite')
+        ).order_by('-favorites', '-id').values_list(
+            'pk', flat=True
+        )[:top_recipes]
+    )
+    return list(dict.fromkeys(urls))
+
+
+ACCESS_LOG_REQUEST = re.compile(r'"GET (/api/\S*) HTTP/[\d.]+" 200 ')
+
+
+def log_urls(lines, limit):
+    """Самые частые успешные GET-запросы к API из журнала доступа
+    nginx или gunicorn (формат combined)."""
+    counts = Counter()
+    for line in lines:
+        match = ACCESS_LOG_REQUEST.search(line)
+        if match and not match.group(1).startswith(
+            settings.WARMUP_SKIP_PREFIXES
+        ):
+            counts[match.group(1)] += 1
+    return [url for url, _ in counts.most_common(limit)]
+
+
+def replay(urls, base_url=None, concurrency=None, time_limit=None):
+    """Запрашивает urls анонимно в concurrency потоков, пока не
+    истекло time_limit секунд. Возвращает {url: статус}, для
+    пропущенных по времени статус None."""
+    from django.db import connections
+    from django.test import Client
+
+    base_url = urlsplit(base_url or settings.WARMUP_BASE_URL)
+    concurrency = concurrency or settings.WARMUP_CONCURRENCY
+    deadline = time.monotonic() + (time_limit or settings.WARMUP_TIME_LIMIT)
+    local = threading.local()
+
+    def fetch(url):
+        if time.monotonic() > deadline:
+            return url, None
+        if not hasattr(local, 'client'):
+            local.client = Client(
+                HTTP_HOST=base_url.netloc,
+                secure=base_url.scheme == 'https',
+            )
+        try:
+            return url, local.client.get(url).status_code
+        except Exception:
+            logger.exception('Прогрев %s завершился ошибкой', url)
+            return url, 500
+        finally:
+            # Соединения потоков пула иначе остались бы открытыми.
+            connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return dict(executor.map(fetch, urls))
+
+
+def warm_caches():
+    """Шаг прогрева: частые запросы из hot_urls()."""
+    results = replay(hot_urls())
+    logger.info(
+        'Прогрето адресов: %s из %s',
+        sum(status == 200 for status in results.values()), len(results),
+    )
+
+
+def run(stage):
+    """Выполняет шаги прогрева этапа из настройки WARMUP_STEPS."""
+    for path in settings.WARMUP_STEPS.get(stage, ()):
+        started = time.perf_counter()
+        try:
+            import_string(path)()
+        except Exception:
+            logger.exception('Шаг прогрева %s завершился ошибкой', path)
+            continue
+        logger.info(
+            'Прогрев %s: %.1f мс', path,
+            (time.perf_counter() - started) * 1000
+        )
@@ -1,2 +1,8 @@
 PAGE_PAGINATION_SIZE: int = 6
 MIN_INGREDIENT_AMOUNT: int = 1
+SIMILAR_RECIPES_LIMIT: int = 10
+SIMILAR_RECIPES_DELAY: int = 60
+PURGE_CHUNK_SIZE: int = 500
+INGREDIENT_SEARCH_LIMIT: int = 20
+BATCH_MAX_REQUESTS: int = 20
+INGREDIENT_SIMILARITY_THRESHOLD: float = 0.6
@@ -3,6 +3,7 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from core.constants import N_PLUS_ONE_THRESHOLD, PRIMARY_PIN_SECONDS
 from foodgram.constants import PAGE_PAGINATION_SIZE
 
 load_dotenv()
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -33,16 +35,22 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.shedding.LoadSheddingMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestInstrumentationMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -65,17 +73,47 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+# DB_POOL=True включает пул соединений внутри процесса,
+# DB_PGBOUNCER=True - режим работы за PgBouncer в transaction pooling.
+DB_POOL = os.getenv('DB_POOL', default=False) == 'True'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_PGBOUNCER', default=False) == 'True',
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=5)),
+            'MAX_IDLE': float(os.getenv('DB_POOL_MAX_IDLE', default=300)),
+            'CHECK_AFTER': float(os.getenv('DB_POOL_CHECK_AFTER', default=30)),
+        },
     }
 }
 
+# Реплики только для чтения: DB_REPLICA_HOSTS=replica1,replica2
+
+DATABASE_REPLICAS = []
+
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', default='').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+PRIMARY_PIN_SECONDS = int(os.getenv('PRIMARY_PIN_SECONDS', default=PRIMARY_PIN_SECONDS))
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.sqlite3',
@@ -144,8 +182,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+        'api.authentication.SignedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'DEFAULT_FILTER_BACKENDS': [
@@ -153,3 +201,232 @@ REST_FRAMEWORK = {
     ],
     'PAGE_SIZE': PAGE_PAGINATION_SIZE,
 }
+
+# Кэш: общий для воркеров (file или memcached) и локальный LRU перед ним.
+# Каталог файлового кэша должен быть общим для веб-процессов и
+# обработчика задач run_worker: иначе инвалидации из задач не видны API
+# (в docker-compose это том cache).
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='file')
+
+CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'core.cache_backends.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION') or os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=100000))},
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('CACHE_LOCATION') or '127.0.0.1:11211',
+        'OPTIONS': {'no_delay': True, 'ignore_exc': True},
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': 'foodgram',
+        'VERSION': int(os.getenv('CACHE_VERSION', default=1)),
+    },
+}
+
+CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', default=300))
+
+TAGGED_CACHE_ALIAS = 'default'
+
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', default=1000))
+
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', default=5))
+
+# Готовые фрагменты рецептов для списков (см. api/fragments.py)
+
+RECIPE_FRAGMENTS = os.getenv('RECIPE_FRAGMENTS', default='True') == 'True'
+
+RECIPE_FRAGMENT_TIMEOUT = int(os.getenv('RECIPE_FRAGMENT_TIMEOUT', default=24 * 60 * 60))
+
+# Сжатие ответов API (gzip, brotli при установленном пакете brotli)
+
+COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', default='True') == 'True'
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', default=6))
+
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', default=4))
+
+COMPRESSION_CONTENT_TYPES = ('application/json', 'text/plain', 'text/html')
+
+COMPRESSION_CACHE_ENTRIES = int(os.getenv('COMPRESSION_CACHE_ENTRIES', default=256))
+
+COMPRESSION_CACHE_TTL = float(os.getenv('COMPRESSION_CACHE_TTL', default=300))
+
+# Кэш аутентификации по токену (0 — без кэша) и подписанные токены
+
+AUTH_CACHE_ALIAS = os.getenv('AUTH_CACHE_ALIAS', default='default')
+
+AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', default=60))
+
+AUTH_SIGNED_TOKENS = os.getenv('AUTH_SIGNED_TOKENS', default=False) == 'True'
+
+AUTH_SIGNED_TOKEN_MAX_AGE = int(os.getenv('AUTH_SIGNED_TOKEN_MAX_AGE', default=24 * 60 * 60))
+
+# Сброс нагрузки: адаптивный предел одновременных запросов процесса
+# и доли предела для приоритетов (см. core/shedding.py). Выключен по
+# умолчанию. Потолок предела выше возможностей воркера, поэтому запросы
+# сбрасываются, только когда предел снизился из-за медленной базы;
+# гарантированное место для critical равно числу потоков gunicorn.
+
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', default='False') == 'True'
+
+LOAD_SHEDDING_MIN_LIMIT = int(os.getenv('LOAD_SHEDDING_MIN_LIMIT', default=1))
+
+LOAD_SHEDDING_MAX_LIMIT = int(os.getenv('LOAD_SHEDDING_MAX_LIMIT', default=100))
+
+LOAD_SHEDDING_CRITICAL_FLOOR = int(os.getenv('LOAD_SHEDDING_CRITICAL_FLOOR') or os.getenv('GUNICORN_THREADS') or 4)
+
+LOAD_SHEDDING_BACKOFF = float(os.getenv('LOAD_SHEDDING_BACKOFF', default=0.9))
+
+LOAD_SHEDDING_DECREASE_INTERVAL = float(os.getenv('LOAD_SHEDDING_DECREASE_INTERVAL', default=0.5))
+
+LOAD_SHEDDING_PRIORITIES = {
+    'critical': [
+        'tags-list', 'tags-detail', 'ingredients-list', 'ingredients-detail',
+        'recipes-detail', 'login', 'logout', 'signed_token', 'users-me',
+    ],
+    'low': [
+        'recipes-download-shopping-cart', 'users-subscriptions',
+    ],
+}
+
+LOAD_SHEDDING_EXEMPT = ['metrics']
+
+LOAD_SHEDDING_SHARES = {'critical': 1.0, 'normal': 0.75, 'low': 0.25}
+
+LOAD_SHEDDING_DB_TARGETS = {'critical': 0.05, 'normal': 0.2, 'low': 1.0}
+
+LOAD_SHEDDING_RETRY_AFTER = {'critical': 1, 'normal': 2, 'low': 10}
+
+LOAD_SHEDDING_DEEP_PAGE = int(os.getenv('LOAD_SHEDDING_DEEP_PAGE', default=50))
+
+LOAD_SHEDDING_DEEP_OFFSET = int(os.getenv('LOAD_SHEDDING_DEEP_OFFSET', default=300))
+
+# Число строк в постраничных списках (core/counts.py): оценка
+# планировщика PostgreSQL от PAGINATION_ESTIMATE_THRESHOLD строк,
+# точные COUNT кэшируются на PAGINATION_COUNT_TTL секунд
+
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', default=10000))
+
+PAGINATION_COUNT_TTL = int(os.getenv('PAGINATION_COUNT_TTL', default=30))
+
+# Пакетные GET-запросы (/api/batch/): число потоков для подзапросов,
+# 1 — подзапросы выполняются по очереди в потоке запроса
+
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', default=1))
+
+# Асинхронное чтение тегов и ингредиентов (api/async_views.py),
+# включается при запуске под ASGI
+
+ASYNC_READ_API = os.getenv('ASYNC_READ_API', default=False) == 'True'
+
+# Замеры SQL и времени обработки запросов, метрики на /api/_metrics
+# (сотрудникам или по заголовку Authorization: Bearer METRICS_TOKEN)
+
+REQUEST_INSTRUMENTATION = os.getenv('REQUEST_INSTRUMENTATION', default=False) == 'True'
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', default=N_PLUS_ONE_THRESHOLD))
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+# Профилирование отдельных запросов, профили доступны в админке
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', default='True') == 'True'
+
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', default='')
+
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0))
+
+PROFILING_SLOW_MS = float(os.getenv('PROFILING_SLOW_MS', default=500))
+
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', default=0.005))
+
+PROFILING_DIR = os.getenv('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+
+PROFILING_MAX_REPORTS = int(os.getenv('PROFILING_MAX_REPORTS', default=100))
+
+# Очередь фоновых задач (core/jobs.py), выполняется командой run_worker
+
+JOB_CONCURRENCY = int(os.getenv('JOB_CONCURRENCY', default=2))
+
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', default=1))
+
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', default=5))
+
+JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', default=10))
+
+JOB_RETRY_BACKOFF_MAX = float(os.getenv('JOB_RETRY_BACKOFF_MAX', default=60 * 60))
+
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', default=10 * 60))
+
+JOB_HEARTBEAT_INTERVAL = int(os.getenv('JOB_HEARTBEAT_INTERVAL', default=30))
+
+JOB_KEEP_DONE = int(os.getenv('JOB_KEEP_DONE', default=24 * 60 * 60))
+
+# Шаги прогрева приложения в gunicorn (см. gunicorn.conf.py)
+
+WARMUP_STEPS = {
+    'master': [
+        'core.warmup.import_api',
+        'core.warmup.prime_content_types',
+    ],
+    'worker': [
+        'core.warmup.fill_pools',
+    ],
+}
+
+# Соединения, открываемые в пуле (DB_POOL) при запуске воркера,
+# по умолчанию по числу потоков gunicorn
+
+WARMUP_DB_CONNECTIONS = int(os.getenv('WARMUP_DB_CONNECTIONS') or os.getenv('GUNICORN_THREADS') or 4)
+
+# Прогрев кэшей частыми анонимными запросами (команда warm_caches),
+# WARMUP_CACHES=True добавляет его в прогрев мастер-процесса gunicorn
+
+WARMUP_CACHES = os.getenv('WARMUP_CACHES', default=False) == 'True'
+
+if WARMUP_CACHES:
+    WARMUP_STEPS['master'].append('core.warmup.warm_caches')
+
+WARMUP_URLS = [
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/recipes/?page=1&limit=6',
+]
+
+WARMUP_SKIP_PREFIXES = ('/api/users/me', '/api/auth/', '/api/_metrics')
+
+WARMUP_BASE_URL = os.getenv('WARMUP_BASE_URL') or CSRF_TRUSTED_ORIGINS[0]
+
+WARMUP_TOP_RECIPES = int(os.getenv('WARMUP_TOP_RECIPES', default=20))
+
+WARMUP_CONCURRENCY = int(os.getenv('WARMUP_CONCURRENCY', default=4))
+
+WARMUP_TIME_LIMIT = float(os.getenv('WARMUP_TIME_LIMIT', default=30))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', default='INFO'),
+        },
+    },
+}
@@ -0,0 +1,61 @@
+"""Конфигурация gunicorn для продакшена.
+
+Число воркеров и потоков считается от доступных процессору ядер и
+переопределяется переменными окружения GUNICORN_*. Приложение
+загружается в мастер-процессе (preload_app), прогревается и
+разделяется воркерами; воркеры перезапускаются после
+max_requests запросов со случайным разбросом против утечек памяти.
+"""
+import gc
+import os
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def env_int(name, default):
+    return int(os.getenv(name) or default)
+
+
+cpus = available_cpus()
+
+wsgi_app = os.getenv('GUNICORN_APP') or 'foodgram.wsgi:application'
+bind = os.getenv('GUNICORN_BIND') or '0.0.0.0:8080'
+workers = env_int('GUNICORN_WORKERS', min(2 * cpus + 1, 12))
+threads = env_int('GUNICORN_THREADS', 4)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS') or (
+    'gthread' if threads > 1 else 'sync'
+)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+worker_tmp_dir = os.getenv('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+if not os.path.isdir(worker_tmp_dir):
+    worker_tmp_dir = None
+
+
+def when_ready(server):
+    """Прогрев в мастере после загрузки приложения, до fork воркеров."""
+    if not preload_app:
+        return
+    from core import warmup
+
+    warmup.run('master')
+    warmup.close_connections()
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Прогрев в воркере до начала приёма соединений."""
+    from core import warmup
+
+    warmup.run('worker')
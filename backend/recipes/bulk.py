@@ -0,0 +1,116 @@
+import io
+
+from django.core.management.color import no_style
+from django.db import connection
+
+COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def copy_supported() -> bool:
+    """Доступна ли загрузка через PostgreSQL COPY."""
+    return connection.vendor == 'postgresql'
+
+
+def reserve_ids(model, count: int) -> list[int]:
+    """Резервирует count значений первичного ключа из последовательности.
+
+    Нужен для COPY: строки вставляются с явными id, чтобы сразу
+    ссылаться на них из связанных таблиц.
+    """
+    if count <= 0:
+        return []
+    table = model._meta.db_table
+    column = model._meta.pk.column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [table, column, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def copy_value(value) -> str:
+    """Представляет значение в текстовом формате COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def copy_rows(model, columns, rows) -> int:
+    """Загружает строки в таблицу модели через COPY ... FROM STDIN.
+
+    rows - итерируемый объект кортежей в порядке columns,
+    None записывается как NULL.
+    """
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+        count += 1
+    if not count:
+        return 0
+    buffer.seek(0)
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_list = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in columns
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {table} ({column_list}) FROM STDIN', buffer
+        )
+    return count
+
+
+def insert_rows(model, columns, rows, use_copy=None) -> int:
+    """Вставляет строки через COPY, если он доступен, иначе bulk_create."""
+    if use_copy is None:
+        use_copy = copy_supported()
+    if use_copy:
+        return copy_rows(model, columns, rows)
+    objects = [model(**dict(zip(columns, row))) for row in rows]
+    model.objects.bulk_create(objects)
+    return len(objects)
+
+
+def next_id(model) -> int:
+    """Первый свободный id для вставки строк с явными ключами."""
+    last = model._base_manager.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first()
+    return (last or 0) + 1
+
+
+def delete_rows(model, field, ids) -> int:
+    """Удаляет строки модели по значениям поля одним DELETE, без
+    Collector и сигналов."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field(field).column)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {column} IN ({placeholders})', ids
+        )
+        return cursor.rowcount
+
+
+def reset_sequences(*models) -> None:
+    """Сдвигает последовательности id после вставки с явными ключами."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
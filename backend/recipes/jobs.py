@@ -0,0 +1,18 @@
+import io
+
+from django.core.management import call_command
+
+from core.jobs import task
+from recipes import purge
+
+
+@task
+def update_similar_recipes():
+    """Пересчёт похожих для изменённых рецептов."""
+    call_command('compute_similar_recipes', stale=True, stdout=io.StringIO())
+
+
+@task
+def purge_deleted():
+    """Удаление скрытых рецептов и пользователей."""
+    purge.purge_deleted()
@@ -0,0 +1,104 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodgram.constants import SIMILAR_RECIPES_LIMIT
+from recipes.bulk import insert_rows
+from recipes.models import Recipe, RecipeNeighbour, StaleRecipeNeighbours
+from recipes.similarity import RecipeVectors
+
+NEIGHBOUR_COLUMNS = ('recipe_id', 'neighbour_id', 'score')
+BLOCK_SIZE = 256
+
+
+class Command(BaseCommand):
+    """Расчёт похожих рецептов в таблицу RecipeNeighbour.
+
+    Без --stale пересчитываются все рецепты, иначе только изменённые
+    после прошлого расчёта (StaleRecipeNeighbours) и рецепты, в чьих
+    списках похожих они были или появятся. Полный пересчёт стоит
+    запускать периодически: веса ингредиентов меняются с ростом базы.
+    """
+
+    help = 'расчёт похожих рецептов по составу ингредиентов'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='пересчитать только изменённые рецепты'
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=SIMILAR_RECIPES_LIMIT,
+            help='число похожих рецептов для каждого рецепта'
+        )
+        parser.add_argument('--block-size', type=int, default=BLOCK_SIZE)
+        parser.add_argument(
+            '--max-df', type=float, default=0.3,
+            help='не учитывать ингредиенты, входящие в большую долю '
+                 'рецептов'
+        )
+        parser.add_argument('--min-score', type=float, default=0.05)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stale = set(StaleRecipeNeighbours.objects.values_list(
+            'recipe_id', flat=True
+        ))
+        if options['stale'] and not stale:
+            self.stdout.write('Изменённых рецептов нет')
+            return
+        vectors = RecipeVectors.load(options['max_df'])
+        self.stdout.write(
+            f'Векторов: {len(vectors.recipe_ids)} '
+            f'({time.monotonic() - started:.1f} с)'
+        )
+        self.options = options
+        if options['stale']:
+            lists = self.compute(vectors, sorted(stale))
+            affected = {
+                neighbour for neighbours in lists.values()
+                for neighbour, _ in neighbours
+            }
+            affected.update(RecipeNeighbour.objects.filter(
+                neighbour_id__in=stale
+            ).values_list('recipe_id', flat=True))
+            affected -= stale
+            lists.update(self.compute(vectors, sorted(affected)))
+            self.write(stale | affected, lists)
+            total = len(lists)
+        else:
+            recipe_ids = list(
+                Recipe.objects.order_by('id').values_list('id', flat=True)
+            )
+            batch_size = options['block_size'] * 8
+            for start in range(0, len(recipe_ids), batch_size):
+                batch = recipe_ids[start:start + batch_size]
+                self.write(batch, self.compute(vectors, batch))
+            total = len(recipe_ids)
+        StaleRecipeNeighbours.objects.filter(recipe_id__in=stale).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рассчитаны для {total} рецептов '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
+
+    def compute(self, vectors, recipe_ids):
+        return dict(vectors.neighbours(
+            recipe_ids, self.options['top_k'],
+            block_size=self.options['block_size'],
+            min_score=self.options['min_score'],
+        ))
+
+    @staticmethod
+    def write(recipe_ids, lists):
+        """Заменяет списки похожих рецептов recipe_ids."""
+        with transaction.atomic():
+            RecipeNeighbour.objects.filter(
+                recipe_id__in=list(recipe_ids)
+            ).delete()
+            insert_rows(RecipeNeighbour, NEIGHBOUR_COLUMNS, [
+                (recipe_id, neighbour_id, score)
+                for recipe_id, neighbours in lists.items()
+                for neighbour_id, score in neighbours
+            ])
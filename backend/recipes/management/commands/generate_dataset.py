@@ -0,0 +1,268 @@
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.bulk import copy_supported, insert_rows, next_id, reset_sequences
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from users.models import Follow, User
+
+INGREDIENTS_CSV = os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv')
+BATCH_SIZE = 5000
+POWER_LAW_ALPHA = 1.1
+INGREDIENTS_MEDIAN = 7.5
+INGREDIENTS_MAX = 30
+TAGS_MAX = 3
+COOKING_TIMES = (5, 10, 15, 20, 30, 40, 45, 60, 90, 120, 180)
+DATE_JOINED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+USER_COLUMNS = (
+    'id', 'password', 'last_login', 'is_superuser', 'username',
+    'first_name', 'last_name', 'email', 'is_staff', 'is_active',
+    'date_joined', 'avatar',
+)
+RECIPE_COLUMNS = (
+    'id', 'author_id', 'name', 'image', 'text', 'cooking_time'
+)
+
+
+class PowerLaw:
+    """Выбор элементов с весами 1 / rank^alpha.
+
+    Порядок рангов перемешивается, чтобы популярность не совпадала
+    с порядком id.
+    """
+
+    def __init__(self, rng, population, alpha=POWER_LAW_ALPHA):
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = list(accumulate(
+            1 / (rank ** alpha)
+            for rank in range(1, len(self.population) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        """Возвращает до count различных элементов."""
+        count = min(count, len(self.population) - (exclude is not None))
+        chosen = set()
+        for _ in range(20):
+            if len(chosen) >= count:
+                break
+            chosen.update(self.rng.choices(
+                self.population, cum_weights=self.cum_weights,
+                k=2 * (count - len(chosen))
+            ))
+            chosen.discard(exclude)
+        while len(chosen) > count:
+            chosen.pop()
+        return chosen
+
+
+class Command(BaseCommand):
+    """Генерация синтетических данных для нагрузочного тестирования.
+
+    Данные детерминированы зерном --seed: при одинаковых параметрах
+    на пустой базе получается одинаковый набор. Подписки, избранное
+    и корзины распределены по степенному закону - у немногих
+    авторов и рецептов большая часть активности, как в продакшене.
+    """
+
+    help = 'генерация синтетических пользователей, рецептов и связей'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--recipes', type=int, default=None,
+            help='количество рецептов, по умолчанию 5 на пользователя'
+        )
+        parser.add_argument(
+            '--follows', type=float, default=10,
+            help='среднее число подписок на пользователя'
+        )
+        parser.add_argument(
+            '--favorites', type=float, default=15,
+            help='среднее число рецептов в избранном пользователя'
+        )
+        parser.add_argument(
+            '--cart', type=float, default=3,
+            help='среднее число рецептов в корзине пользователя'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--password', type=str, default='foodgram-load',
+            help='пароль всех сгенерированных пользователей'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='не использовать COPY даже на PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы 2 пользователя')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.use_copy = copy_supported() and not options['no_copy']
+        self.started = time.monotonic()
+        if not Ingredient.objects.exists():
+            call_command('sync_catalog', only='ingredients')
+        if not Tag.objects.exists():
+            call_command('sync_catalog', only='tags')
+        ingredients = self.load_ingredients()
+        tags = list(Tag.objects.order_by('id').values_list('id', flat=True))
+        with transaction.atomic():
+            users = self.create_users(
+                options['users'], options['seed'], options['password']
+            )
+            recipes = self.create_recipes(
+                users,
+                options['recipes'] or options['users'] * 5,
+                ingredients,
+                tags,
+            )
+            self.create_follows(users, options['follows'])
+            for model, average in (
+                (Favorite, options['favorites']),
+                (ShoppingCart, options['cart']),
+            ):
+                self.create_user_recipe_links(model, users, recipes, average)
+            reset_sequences(
+                User, Recipe, RecipeIngredient, Recipe.tags.through,
+                Follow, Favorite, ShoppingCart,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные сгенерированы за {time.monotonic() - self.started:.1f} с'
+        ))
+
+    def load_ingredients(self):
+        """Ингредиенты из data/ingredients.csv в порядке файла."""
+        ids = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).iterator()
+        }
+        with open(INGREDIENTS_CSV, 'r', encoding='utf8', newline='') as file:
+            ingredients = [
+                ids[key]
+                for key in (
+                    (row['name'], row['measurement_unit'])
+                    for row in csv.DictReader(file)
+                )
+                if key in ids
+            ]
+        if not ingredients:
+            raise CommandError('В базе нет ингредиентов из ingredients.csv')
+        return ingredients
+
+    def insert(self, model, columns, rows):
+        """Вставляет строки пакетами и сообщает о прогрессе."""
+        rows = iter(rows)
+        total = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            total += insert_rows(model, columns, batch, self.use_copy)
+        self.stdout.write(
+            f'{model._meta.db_table}: {total} строк '
+            f'({time.monotonic() - self.started:.1f} с)'
+        )
+        return total
+
+    def create_users(self, count, seed, password):
+        start = next_id(User)
+        password_hash = make_password(password)
+        ids = list(range(start, start + count))
+
+        def rows():
+            for number, pk in enumerate(ids):
+                username = f'load{seed}_{pk}'
+                yield (
+                    pk, password_hash, None, False, username,
+                    f'Имя{number}', f'Фамилия{number}',
+                    f'{username}@example.com', False, True,
+                    DATE_JOINED + timedelta(minutes=number), None,
+                )
+
+        self.insert(User, USER_COLUMNS, rows())
+        return ids
+
+    def create_recipes(self, users, count, ingredients, tags):
+        start = next_id(Recipe)
+        ids = list(range(start, start + count))
+        authors = PowerLaw(self.rng, users)
+        recipe_authors = self.rng.choices(
+            authors.population, cum_weights=authors.cum_weights, k=count
+        )
+        self.insert(Recipe, RECIPE_COLUMNS, (
+            (
+                pk, author, f'Рецепт {pk}', '',
+                f'Описание рецепта {pk}', self.rng.choice(COOKING_TIMES),
+            )
+            for pk, author in zip(ids, recipe_authors)
+        ))
+        popular_ingredients = PowerLaw(self.rng, ingredients)
+        self.insert(
+            RecipeIngredient, ('recipe_id', 'ingredient_id', 'amount'),
+            (
+                (pk, ingredient, self.rng.randint(1, 500))
+                for pk in ids
+                for ingredient in sorted(popular_ingredients.sample(
+                    self.ingredients_count()
+                ))
+            )
+        )
+        self.insert(
+            Recipe.tags.through, ('recipe_id', 'tag_id'),
+            (
+                (pk, tag)
+                for pk in ids
+                for tag in sorted(self.rng.sample(
+                    tags, self.rng.randint(1, min(TAGS_MAX, len(tags)))
+                ))
+            )
+        )
+        return ids
+
+    def ingredients_count(self):
+        """Число ингредиентов в рецепте: логнормальное, медиана ~7."""
+        value = self.rng.lognormvariate(0, 0.45) * INGREDIENTS_MEDIAN
+        return max(1, min(INGREDIENTS_MAX, round(value)))
+
+    def link_count(self, average):
+        """Число связей пользователя: экспоненциальное со средним average."""
+        if average <= 0:
+            return 0
+        return int(self.rng.expovariate(1 / average))
+
+    def create_follows(self, users, average):
+        followees = PowerLaw(self.rng, users)
+        self.insert(Follow, ('user_id', 'following_id'), (
+            (user, following)
+            for user in users
+            for following in sorted(followees.sample(
+                self.link_count(average), exclude=user
+            ))
+        ))
+
+    def create_user_recipe_links(self, model, users, recipes, average):
+        popular_recipes = PowerLaw(self.rng, recipes)
+        self.insert(model, ('user_id', 'recipe_id'), (
+            (user, recipe)
+            for user in users
+            for recipe in sorted(
+                popular_recipes.sample(self.link_count(average))
+            )
+        ))
@@ -2,7 +2,7 @@ import csv
 import os
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from recipes.models import Ingredient, Tag
 
@@ -16,21 +16,34 @@ TABLES_DICT = {
 class Command(BaseCommand):
     """Команда импорта данных из csv-файла.
 
-    Создаются соответствующие модели в бд.
+    Создаются соответствующие модели в бд. Уже существующие записи
+    пропускаются, для обновления справочников есть команда sync_catalog.
     """
 
     help = 'загрузка данных их CSV файла в базу данных'
+    requires_system_checks = []
 
     def add_arguments(self, parser):
         parser.add_argument(
             'filename',
-            default='ingredients.csv',
+            default=None,
             nargs='?',
             type=str
         )
 
     def handle(self, *args, **options):
-        for model_class, filename in TABLES_DICT.items():
+        tables = TABLES_DICT.items()
+        if options['filename']:
+            tables = [
+                (model_class, filename) for model_class, filename in tables
+                if filename == options['filename']
+            ]
+            if not tables:
+                raise CommandError(
+                    f'Неизвестный файл {options["filename"]}, '
+                    f'доступны: {", ".join(TABLES_DICT.values())}'
+                )
+        for model_class, filename in tables:
             csv_file_path = os.path.join(DATA_ROOT, filename)
             row_list = []
             with open(
@@ -42,7 +55,7 @@ class Command(BaseCommand):
                         row_list.append(model_class(**row))
                     except Exception as error:
                         self.stdout.write(f'Ошибка в строке {row}. {error}')
-            model_class.objects.bulk_create(row_list)
+            model_class.objects.bulk_create(row_list, ignore_conflicts=True)
             self.stdout.write(
                 self.style.SUCCESS(f'Данные {filename} УСПЕШНО загружены')
             )
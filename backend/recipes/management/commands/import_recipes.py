@@ -0,0 +1,363 @@
+import csv
+import json
+import os
+import time
+from functools import partial
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import tagged_cache
+from recipes.bulk import copy_supported, insert_rows, reserve_ids
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.signals import mark_stale_on_commit, recipe_tags
+from users.models import User
+
+BATCH_SIZE = 1000
+CSV_LIST_SEPARATOR = ';'
+CSV_AMOUNT_SEPARATOR = ':'
+RECIPE_COLUMNS = (
+    'id', 'author_id', 'name', 'image', 'text', 'cooking_time'
+)
+INGREDIENT_COLUMNS = ('recipe_id', 'ingredient_id', 'amount')
+TAG_COLUMNS = ('recipe_id', 'tag_id')
+
+
+class RowError(Exception):
+    """Ошибка в данных одной строки импорта."""
+
+
+class Command(BaseCommand):
+    """Потоковый импорт рецептов из JSONL или CSV.
+
+    Строки читаются и записываются пакетами фиксированного размера,
+    после каждого пакета сохраняется контрольная точка, поэтому
+    прерванный импорт продолжается с места остановки. Картинки
+    копируются в хранилище только после фиксации пакета: откаченный
+    пакет не оставляет файлов.
+
+    Формат JSONL - одна строка на рецепт:
+    {"name": ..., "text": ..., "cooking_time": 10, "author": "email",
+     "image": "путь/к/файлу.jpg", "tags": ["breakfast"],
+     "ingredients": [{"name": "соль", "amount": 5}]}
+
+    В CSV те же колонки, теги перечисляются через ";",
+    ингредиенты - в виде "соль:5;сахар:10".
+    """
+
+    help = 'потоковый импорт рецептов из JSONL/CSV файла'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str)
+        parser.add_argument(
+            '--format', choices=('jsonl', 'csv'), default=None,
+            help='формат файла, по умолчанию определяется по расширению'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--checkpoint', type=str, default=None,
+            help='файл контрольной точки, по умолчанию <path>.checkpoint'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='игнорировать контрольную точку и начать сначала'
+        )
+        parser.add_argument(
+            '--images-dir', type=str, default=None,
+            help='каталог, относительно которого заданы пути картинок'
+        )
+        parser.add_argument(
+            '--errors', type=str, default=None,
+            help='файл для записи ошибочных строк в формате JSONL'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='не использовать COPY даже на PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Размер пакета должен быть больше 0')
+        self.images_dir = options['images_dir'] or os.path.dirname(path)
+        self.use_copy = copy_supported() and not options['no_copy']
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        state = {'position': 0, 'imported': 0, 'errors': 0}
+        if not options['restart']:
+            state.update(self.load_checkpoint(checkpoint_path, path))
+        self.load_reference_maps()
+        errors_file = (
+            open(options['errors'], 'a', encoding='utf8')
+            if options['errors'] else None
+        )
+        started = time.monotonic()
+        resumed_from = state['position']
+        if resumed_from:
+            self.stdout.write(
+                f'Продолжение импорта со строки {resumed_from + 1}'
+            )
+        try:
+            rows = islice(
+                self.read_rows(path, file_format), resumed_from, None
+            )
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                recipes = []
+                for line_number, row in batch:
+                    try:
+                        recipes.append(self.parse_row(row))
+                    except RowError as error:
+                        state['errors'] += 1
+                        self.report_error(
+                            errors_file, line_number, row, error
+                        )
+                with transaction.atomic():
+                    self.write_batch(recipes)
+                state['position'] = batch[-1][0]
+                state['imported'] += len(recipes)
+                self.save_checkpoint(checkpoint_path, path, state)
+                processed = state['position'] - resumed_from
+                rate = processed / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Обработано строк: {state["position"]}, '
+                    f'импортировано: {state["imported"]}, '
+                    f'ошибок: {state["errors"]} ({rate:.0f} строк/с)'
+                )
+        finally:
+            if errors_file:
+                errors_file.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт {path} завершён: рецептов {state["imported"]}, '
+            f'ошибок {state["errors"]}'
+        ))
+
+    def read_rows(self, path, file_format):
+        """Лениво отдаёт пары (номер строки, словарь данных)."""
+        with open(path, 'r', encoding='utf8', newline='') as file:
+            if file_format == 'csv':
+                for line_number, row in enumerate(csv.DictReader(file), 1):
+                    yield line_number, row
+                return
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    yield line_number, None
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as error:
+                    yield line_number, {'_error': str(error), '_raw': line}
+
+    def load_reference_maps(self):
+        """Загружает словари имя -> id для ссылок из файла импорта."""
+        self.ingredients = {}
+        for pk, name in Ingredient.objects.values_list(
+                'id', 'name'
+        ).order_by('id').iterator():
+            self.ingredients.setdefault(name.lower(), pk)
+        self.tags = {}
+        for pk, name, slug in Tag.objects.values_list('id', 'name', 'slug'):
+            self.tags[slug.lower()] = pk
+            self.tags[name.lower()] = pk
+        self.authors = {}
+        for pk, email, username in User.objects.values_list(
+                'id', 'email', 'username'
+        ).iterator():
+            self.authors[email.lower()] = pk
+            self.authors.setdefault(username.lower(), pk)
+
+    def parse_row(self, row):
+        """Проверяет строку и переводит ссылки по имени в id."""
+        if not row:
+            raise RowError('Пустая строка')
+        if '_error' in row:
+            raise RowError(f'Некорректный JSON: {row["_error"]}')
+        name = (row.get('name') or '').strip()
+        text = (row.get('text') or '').strip()
+        if not name or not text:
+            raise RowError('Не заполнены название или описание')
+        try:
+            cooking_time = int(row.get('cooking_time'))
+        except (TypeError, ValueError):
+            raise RowError('Некорректное время приготовления')
+        if cooking_time < 1:
+            raise RowError('Время приготовления меньше 1 минуты')
+        author = str(row.get('author') or '').strip().lower()
+        if author not in self.authors:
+            raise RowError(f'Автор {author!r} не найден')
+        tags = row.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tag for tag in tags.split(CSV_LIST_SEPARATOR) if tag]
+        tag_ids = []
+        for tag in tags:
+            tag_id = self.tags.get(tag.strip().lower())
+            if tag_id is None:
+                raise RowError(f'Тег {tag!r} не найден')
+            if tag_id not in tag_ids:
+                tag_ids.append(tag_id)
+        ingredients = {}
+        for ingredient_name, amount in self.parse_ingredients(
+                row.get('ingredients')
+        ):
+            ingredient_id = self.ingredients.get(
+                ingredient_name.strip().lower()
+            )
+            if ingredient_id is None:
+                raise RowError(f'Ингредиент {ingredient_name!r} не найден')
+            if amount < 1:
+                raise RowError(
+                    f'Количество {ingredient_name!r} меньше 1'
+                )
+            ingredients[ingredient_id] = (
+                ingredients.get(ingredient_id, 0) + amount
+            )
+        if not ingredients:
+            raise RowError('Список ингредиентов пуст')
+        return {
+            'author_id': self.authors[author],
+            'name': name[:Recipe._meta.get_field('name').max_length],
+            'text': text,
+            'cooking_time': cooking_time,
+            'image': '',
+            'image_source': self.image_source(row.get('image')),
+            'tags': tag_ids,
+            'ingredients': ingredients,
+        }
+
+    def parse_ingredients(self, value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [
+                item.rsplit(CSV_AMOUNT_SEPARATOR, 1)
+                for item in value.split(CSV_LIST_SEPARATOR) if item
+            ]
+        else:
+            value = [
+                (item.get('name'), item.get('amount'))
+                if isinstance(item, dict) else item
+                for item in value
+            ]
+        parsed = []
+        for item in value:
+            try:
+                ingredient_name, amount = item
+                parsed.append((str(ingredient_name), int(amount)))
+            except (TypeError, ValueError):
+                raise RowError(f'Некорректный ингредиент {item!r}')
+        return parsed
+
+    def image_source(self, image):
+        """Путь к файлу картинки рецепта, если она задана."""
+        if not image:
+            return None
+        source = os.path.join(self.images_dir, image)
+        if not os.path.isfile(source):
+            raise RowError(f'Картинка {image!r} не найдена')
+        return source
+
+    def batch_committed(self, recipes):
+        """Копирует картинки зафиксированного пакета в хранилище и
+        инвалидирует кэш его рецептов."""
+        stored = []
+        for recipe in recipes:
+            if recipe['image_source'] is None:
+                continue
+            with open(recipe['image_source'], 'rb') as file:
+                recipe['image'] = default_storage.save(
+                    f'recipes/{os.path.basename(recipe["image_source"])}',
+                    File(file)
+                )
+            stored.append(Recipe(pk=recipe['id'], image=recipe['image']))
+        Recipe.all_objects.bulk_update(stored, ['image'])
+        tagged_cache.invalidate(*{
+            tag for recipe in recipes
+            for tag in recipe_tags(recipe['id'], recipe['author_id'])
+        })
+
+    def write_batch(self, recipes):
+        if not recipes:
+            return
+        if self.use_copy:
+            ids = reserve_ids(Recipe, len(recipes))
+            for recipe, pk in zip(recipes, ids):
+                recipe['id'] = pk
+            insert_rows(
+                Recipe, RECIPE_COLUMNS,
+                ([recipe[column] for column in RECIPE_COLUMNS]
+                 for recipe in recipes),
+                use_copy=True
+            )
+        else:
+            created = Recipe.objects.bulk_create([
+                Recipe(**{
+                    column: recipe[column]
+                    for column in RECIPE_COLUMNS[1:]
+                })
+                for recipe in recipes
+            ])
+            for recipe, obj in zip(recipes, created):
+                recipe['id'] = obj.pk
+        insert_rows(
+            RecipeIngredient, INGREDIENT_COLUMNS,
+            [
+                (recipe['id'], ingredient_id, amount)
+                for recipe in recipes
+                for ingredient_id, amount in recipe['ingredients'].items()
+            ],
+            use_copy=self.use_copy
+        )
+        insert_rows(
+            Recipe.tags.through, TAG_COLUMNS,
+            [
+                (recipe['id'], tag_id)
+                for recipe in recipes
+                for tag_id in recipe['tags']
+            ],
+            use_copy=self.use_copy
+        )
+        mark_stale_on_commit(recipe['id'] for recipe in recipes)
+        transaction.on_commit(partial(self.batch_committed, recipes))
+
+    def report_error(self, errors_file, line_number, row, error):
+        self.stderr.write(f'Ошибка в строке {line_number}: {error}')
+        if errors_file:
+            errors_file.write(json.dumps(
+                {'line': line_number, 'error': str(error), 'row': row},
+                ensure_ascii=False
+            ) + '\n')
+
+    def load_checkpoint(self, checkpoint_path, path):
+        if not os.path.exists(checkpoint_path):
+            return {}
+        with open(checkpoint_path, 'r', encoding='utf8') as file:
+            checkpoint = json.load(file)
+        if checkpoint.get('source') != os.path.abspath(path):
+            raise CommandError(
+                f'Контрольная точка {checkpoint_path} относится к другому '
+                'файлу, используйте --restart'
+            )
+        return {
+            key: checkpoint.get(key, 0)
+            for key in ('position', 'imported', 'errors')
+        }
+
+    def save_checkpoint(self, checkpoint_path, path, state):
+        temporary_path = f'{checkpoint_path}.tmp'
+        with open(temporary_path, 'w', encoding='utf8') as file:
+            json.dump(
+                {'source': os.path.abspath(path), **state}, file
+            )
+        os.replace(temporary_path, checkpoint_path)
@@ -0,0 +1,72 @@
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from api.fragments import SCHEMA_TAG, build_fragments
+from core.cache import tagged_cache
+from recipes.models import Recipe
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    """Пересборка JSON-фрагментов рецептов (api.fragments).
+
+    Сначала все фрагменты объявляются устаревшими (нужно после
+    изменения полей сериализаторов), затем, если указан --base-url,
+    фрагменты строятся заново от новых рецептов к старым.
+    """
+
+    help = 'сброс и повторное построение фрагментов рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default=None,
+            help='адрес сайта для ссылок на картинки, '
+                 'например https://foodgram.example; '
+                 'без него фрагменты только сбрасываются'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=0,
+            help='построить фрагменты только для N новых рецептов'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='не сбрасывать существующие фрагменты'
+        )
+
+    def handle(self, *args, **options):
+        if not options['keep']:
+            tagged_cache.invalidate(SCHEMA_TAG)
+            self.stdout.write('Фрагменты рецептов сброшены')
+        if not options['base_url']:
+            return
+        parts = urlsplit(options['base_url'])
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise CommandError('Укажите --base-url вида https://host')
+        request = RequestFactory().get(
+            '/', HTTP_HOST=parts.netloc,
+            secure=parts.scheme == 'https',
+        )
+        queryset = Recipe.objects.order_by('-id').values_list(
+            'id', 'author_id'
+        )
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+        started = time.monotonic()
+        built = 0
+        batch = []
+        for recipe in queryset.iterator(chunk_size=options['batch_size']):
+            batch.append(recipe)
+            if len(batch) >= options['batch_size']:
+                built += len(build_fragments(batch, request))
+                batch = []
+        if batch:
+            built += len(build_fragments(batch, request))
+        self.stdout.write(self.style.SUCCESS(
+            f'Построено фрагментов: {built} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,127 @@
+import csv
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import invalidate_on_commit
+from recipes.models import Ingredient, Tag
+
+DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+CATALOGS = {
+    'ingredients': {
+        'model': Ingredient,
+        'key_fields': ('name', 'measurement_unit'),
+        'update_fields': (),
+        'default': 'ingredients.csv',
+    },
+    'tags': {
+        'model': Tag,
+        'key_fields': ('slug',),
+        'update_fields': ('name',),
+        'default': 'tags.csv',
+    },
+}
+
+
+class Command(BaseCommand):
+    """Идемпотентная синхронизация справочников ингредиентов и тегов.
+
+    Записи сравниваются по естественному ключу: ингредиенты - по паре
+    (название, единица измерения), теги - по slug. Новые записи
+    добавляются, изменённые обновляются, всё в одной транзакции,
+    поэтому команду можно безопасно запускать при каждом деплое.
+    """
+
+    help = 'синхронизация ингредиентов и тегов из CSV/JSON файлов'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        for catalog, options in CATALOGS.items():
+            parser.add_argument(
+                f'--{catalog}', type=str,
+                default=os.path.join(DATA_ROOT, options['default']),
+                help=f'CSV или JSON файл справочника {catalog}'
+            )
+        parser.add_argument(
+            '--only', choices=tuple(CATALOGS), default=None,
+            help='синхронизировать только один справочник'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='только показать изменения, ничего не записывая'
+        )
+
+    def handle(self, *args, **options):
+        catalogs = (options['only'],) if options['only'] else CATALOGS
+        with transaction.atomic():
+            for catalog in catalogs:
+                self.sync(
+                    catalog, options[catalog], dry_run=options['dry_run']
+                )
+
+    def sync(self, catalog, path, dry_run=False):
+        config = CATALOGS[catalog]
+        model = config['model']
+        key_fields = config['key_fields']
+        update_fields = config['update_fields']
+        rows = {}
+        for row in read_catalog(path, key_fields + update_fields):
+            rows[tuple(row[field] for field in key_fields)] = row
+        existing = {
+            values[:len(key_fields)]: values[len(key_fields):]
+            for values in model.objects.values_list(
+                *key_fields, *update_fields
+            ).iterator()
+        }
+        added, changed, unchanged = [], [], 0
+        for key, row in rows.items():
+            values = tuple(row[field] for field in update_fields)
+            if key not in existing:
+                added.append(row)
+            elif existing[key] != values:
+                changed.append(row)
+            else:
+                unchanged += 1
+        if not dry_run and (added or changed):
+            objects = [model(**row) for row in added + changed]
+            if update_fields:
+                model.objects.bulk_create(
+                    objects,
+                    update_conflicts=True,
+                    unique_fields=key_fields,
+                    update_fields=update_fields,
+                )
+            else:
+                model.objects.bulk_create(objects, ignore_conflicts=True)
+            invalidate_on_commit(catalog, 'recipes')
+        self.stdout.write(self.style.SUCCESS(
+            f'{catalog}: добавлено {len(added)}, '
+            f'изменено {len(changed)}, без изменений {unchanged}'
+            + (' (пробный запуск)' if dry_run else '')
+        ))
+        for row in changed:
+            self.stdout.write(f'  изменено: {row}')
+
+
+def read_catalog(path, fields):
+    """Читает записи справочника из CSV или JSON файла."""
+    if not os.path.exists(path):
+        raise CommandError(f'Файл {path} не найден')
+    with open(path, 'r', encoding='utf8', newline='') as file:
+        if path.endswith('.json'):
+            try:
+                rows = json.load(file)
+            except ValueError as error:
+                raise CommandError(f'Некорректный JSON в {path}: {error}')
+        else:
+            rows = list(csv.DictReader(file))
+    for number, row in enumerate(rows, 1):
+        try:
+            yield {field: str(row[field]).strip() for field in fields}
+        except (KeyError, TypeError):
+            raise CommandError(
+                f'В записи {number} файла {path} нет полей {fields}'
+            )
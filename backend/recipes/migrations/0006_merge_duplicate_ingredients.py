@@ -0,0 +1,52 @@
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Склеивает дубли ингредиентов, созданные повторным import_csv.
+
+    Строки состава рецепта, которые после склейки указывают на один
+    ингредиент, объединяются с суммой количества.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicates.iterator():
+        extra = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit'],
+        ).exclude(id=group['keep_id'])
+        kept = {}
+        rows = RecipeIngredient.objects.filter(
+            models.Q(ingredient__in=extra)
+            | models.Q(ingredient_id=group['keep_id'])
+        ).order_by('id')
+        for row in rows:
+            first = kept.get(row.recipe_id)
+            if first is None:
+                kept[row.recipe_id] = row
+                if row.ingredient_id != group['keep_id']:
+                    row.ingredient_id = group['keep_id']
+                    row.save(update_fields=['ingredient'])
+                continue
+            first.amount += row.amount
+            first.save(update_fields=['amount'])
+            row.delete()
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_alter_tag_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+INDEX_NAME = 'ingredient_name_trgm'
+
+
+def create_trigram_index(apps, schema_editor):
+    """GIN-индекс pg_trgm для поиска ингредиентов (recipes.search).
+
+    Индекс по UPPER(name): так его используют и оператор %>, и
+    UPPER(name) LIKE, в который Django превращает icontains.
+
+    В других базах поиск идёт по индексу в памяти, поэтому миграция
+    для них ничего не делает.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('recipes', 'Ingredient')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        f'ON {schema_editor.quote_name(table)} '
+        f'USING gin (UPPER(name) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_neighbours'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,6 +1,9 @@
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, router
+from django.utils import timezone
 
+from core.cache import invalidate_on_commit
+from core.jobs import enqueue
 from users.models import User
 
 
@@ -36,6 +39,12 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='ingredient_unique'
+            )
+        ]
         verbose_name = 'ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -43,6 +52,43 @@ class Ingredient(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Скрывает рецепты (deleted_at) вместо удаления: строки и
+        зависимые записи удаляет порциями задача purge_deleted
+        (recipes.purge), файлы картинок — после фиксации."""
+        rows = list(
+            self.filter(deleted_at__isnull=True).values_list('pk', 'author_id')
+        )
+        if not rows:
+            return 0, {}
+        self.model.all_objects.using(self.db).filter(
+            pk__in=[pk for pk, _ in rows]
+        ).update(deleted_at=timezone.now())
+        invalidate_on_commit(
+            'recipes',
+            *(f'recipe:{pk}' for pk, _ in rows),
+            *{f'user:{author_id}' for _, author_id in rows},
+            using=self.db,
+        )
+        enqueue(
+            'recipes.jobs.purge_deleted', dedup_key='purge-deleted',
+            using=self.db,
+        )
+        return len(rows), {self.model._meta.label: len(rows)}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    """Рецепты без скрытых."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -79,14 +125,36 @@ class Recipe(models.Model):
             )
         ]
     )
+    deleted_at = models.DateTimeField(
+        'Удалён',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = RecipeManager()
+    all_objects = RecipeQuerySet.as_manager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=('deleted_at',),
+                condition=models.Q(deleted_at__isnull=False),
+                name='recipe_deleted',
+            )
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'рецепты'
 
     def __str__(self):
         return self.name
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        return type(self).all_objects.using(using).filter(
+            pk=self.pk
+        ).delete()
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -185,3 +253,51 @@ class ShoppingCart(models.Model):
         ]
         verbose_name = 'корзина покупок'
         verbose_name_plural = 'Корзины покупок'
+
+
+class RecipeNeighbour(models.Model):
+    """Похожий рецепт по составу ингредиентов (косинусная близость
+    TF-IDF векторов), заполняется командой compute_similar_recipes."""
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name='Рецепт'
+    )
+    neighbour = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField('Близость')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'neighbour'),
+                name='recipe_neighbour_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('recipe', '-score'), name='recipe_neighbour_score'
+            )
+        ]
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+
+class StaleRecipeNeighbours(models.Model):
+    """Рецепт, состав которого изменился после расчёта похожих."""
+
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Рецепт'
+    )
+    created = models.DateTimeField('Изменён', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'рецепт для пересчёта похожих'
+        verbose_name_plural = 'Рецепты для пересчёта похожих'
@@ -0,0 +1,110 @@
+"""Удаление скрытых рецептов и пользователей.
+
+delete() рецептов и пользователей только отмечает строки deleted_at, и
+менеджеры по умолчанию их больше не видят. Здесь строки удаляются
+порциями по PURGE_CHUNK_SIZE, каждая порция в своей транзакции:
+зависимые строки — одним DELETE на таблицу (bulk.delete_rows), без
+Collector, который выбирает все связанные объекты в память и удаляет
+их по одному запросу на порцию id. Файлы картинок удаляются из
+хранилища после фиксации транзакции.
+
+Пользователь удаляется, когда удалены все его рецепты.
+"""
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+
+from foodgram.constants import PURGE_CHUNK_SIZE
+from recipes.bulk import delete_rows
+from recipes.models import Recipe
+from users.models import User
+
+logger = logging.getLogger('foodgram.purge')
+
+
+def dependents(model):
+    """Связи на модель: (модель, поле внешнего ключа, on_delete),
+    включая скрытые (related_name='+') и таблицы ManyToMany."""
+    return [
+        (relation.related_model, relation.field.name, relation.on_delete)
+        for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete and (
+            relation.one_to_many or relation.one_to_one
+        )
+    ]
+
+
+def remove_files_on_commit(names):
+    names = [name for name in names if name]
+    if not names:
+        return
+
+    def remove():
+        for name in names:
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.warning('Не удалось удалить файл %s', name)
+
+    transaction.on_commit(remove)
+
+
+def purge_rows(queryset, file_field, limit):
+    """Удаляет до limit строк queryset с зависимыми строками и файлами
+    поля file_field. Возвращает число удалённых строк."""
+    model = queryset.model
+    with transaction.atomic():
+        rows = list(
+            queryset.order_by('pk').values_list('pk', file_field)[:limit]
+        )
+        if not rows:
+            return 0
+        ids = [pk for pk, _ in rows]
+        for related, field, on_delete in dependents(model):
+            if on_delete is models.SET_NULL:
+                related._base_manager.filter(
+                    **{f'{field}__in': ids}
+                ).update(**{field: None})
+            elif on_delete is models.CASCADE:
+                delete_rows(related, field, ids)
+        delete_rows(model, model._meta.pk.name, ids)
+        remove_files_on_commit(name for _, name in rows)
+    return len(rows)
+
+
+def purge_recipes(limit=PURGE_CHUNK_SIZE):
+    return purge_rows(
+        Recipe.all_objects.filter(deleted_at__isnull=False), 'image', limit
+    )
+
+
+def purge_users(limit=PURGE_CHUNK_SIZE):
+    return purge_rows(
+        User.all_objects.filter(deleted_at__isnull=False).exclude(
+            Exists(Recipe.all_objects.filter(author=OuterRef('pk')))
+        ),
+        'avatar', limit,
+    )
+
+
+def purge_deleted(limit=PURGE_CHUNK_SIZE):
+    """Удаляет все скрытые рецепты, затем пользователей.
+    Возвращает (рецептов, пользователей)."""
+    recipes = users = 0
+    while True:
+        count = purge_recipes(limit)
+        if not count:
+            break
+        recipes += count
+    while True:
+        count = purge_users(limit)
+        if not count:
+            break
+        users += count
+    if recipes or users:
+        logger.info(
+            'Удалено рецептов: %s, пользователей: %s', recipes, users
+        )
+    return recipes, users
@@ -0,0 +1,173 @@
+"""Поиск ингредиентов по названию с опечатками.
+
+Результаты ранжируются так: сначала названия, начинающиеся с запроса,
+затем содержащие его, затем похожие по триграммам (word similarity
+pg_trgm: доля триграмм запроса, найденных в названии), внутри групп —
+по убыванию похожести и по названию.
+
+В PostgreSQL поиск идёт по GIN-индексу gin_trgm_ops на UPPER(name)
+(миграция 0008), в остальных базах — по триграммному индексу в памяти
+процесса. Индекс строится из таблицы ингредиентов и перестраивается
+после изменения справочника (тег кэша "ingredients"), в других
+процессах — не позже CACHE_LOCAL_TTL.
+"""
+import heapq
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.db.models.functions import Upper
+
+from core.cache import tagged_cache
+from core.constants import SEARCH_DURATION_BUCKETS
+from core.metrics import registry
+from foodgram.constants import (INGREDIENT_SEARCH_LIMIT,
+                                INGREDIENT_SIMILARITY_THRESHOLD)
+from recipes.models import Ingredient
+
+SEARCH_DURATION = registry.histogram(
+    'foodgram_ingredient_search_seconds',
+    'Время поиска ингредиентов', ('backend',),
+    buckets=SEARCH_DURATION_BUCKETS,
+)
+WORD_SEPARATORS = re.compile(r'\W+')
+
+
+def normalize(text):
+    return ' '.join(WORD_SEPARATORS.split(text.lower())).strip()
+
+
+def trigrams(text):
+    """Триграммы слов как в pg_trgm: слово дополняется двумя пробелами
+    слева и одним справа."""
+    result = set()
+    for word in text.split():
+        padded = f'  {word} '
+        result.update(
+            padded[start:start + 3] for start in range(len(padded) - 2)
+        )
+    return result
+
+
+class TrigramIndex:
+    """Обратный индекс триграмм названий ингредиентов."""
+
+    def __init__(self, rows, version=None):
+        """rows: [(id, name), ...]."""
+        self.version = version
+        self.ids = []
+        self.names = []
+        self.postings = defaultdict(list)
+        for position, (pk, name) in enumerate(rows):
+            name = normalize(name)
+            self.ids.append(pk)
+            self.names.append(name)
+            for trigram in trigrams(name):
+                self.postings[trigram].append(position)
+
+    def search(self, term, limit, threshold=INGREDIENT_SIMILARITY_THRESHOLD):
+        """id ингредиентов, подходящих под запрос, в порядке ранга."""
+        term = normalize(term)
+        if not term:
+            return []
+        query = trigrams(term)
+        counts = defaultdict(int)
+        for trigram in query:
+            for position in self.postings.get(trigram, ()):
+                counts[position] += 1
+        if len(term) < 3:
+            # Подстроку короче триграммы индекс не находит.
+            positions = [
+                position for position, name in enumerate(self.names)
+                if term in name
+            ]
+        else:
+            positions = counts
+        needed = threshold * len(query)
+        groups = ([], [], [])
+        for position in positions:
+            name = self.names[position]
+            if name.startswith(term):
+                groups[0].append(position)
+            elif term in name:
+                groups[1].append(position)
+            elif counts[position] >= needed:
+                groups[2].append(position)
+        found = []
+        for group in groups:
+            if len(found) >= limit:
+                break
+            found.extend(heapq.nsmallest(
+                limit - len(found), group,
+                key=lambda position: (-counts.get(position, 0),
+                                      self.names[position]),
+            ))
+        return [self.ids[position] for position in found]
+
+
+class IndexHolder:
+    """Индекс процесса, сверяемый с версией тега не чаще раза
+    в CACHE_LOCAL_TTL."""
+
+    tag = 'ingredients'
+
+    def __init__(self):
+        self.index = None
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        index = self.index
+        if index is not None and (
+            time.monotonic() - self.checked < settings.CACHE_LOCAL_TTL
+        ):
+            return index
+        with self.lock:
+            version = tagged_cache.tag_versions([self.tag])[self.tag]
+            if self.index is None or self.index.version != version:
+                self.index = TrigramIndex(
+                    Ingredient.objects.order_by('id').values_list(
+                        'id', 'name'
+                    ),
+                    version,
+                )
+            self.checked = time.monotonic()
+            return self.index
+
+
+index_holder = IndexHolder()
+
+
+def search_ingredients(queryset, term, limit=INGREDIENT_SEARCH_LIMIT):
+    """Не более limit ингредиентов queryset, подходящих под term,
+    в порядке ранга."""
+    started = time.perf_counter()
+    if connections[queryset.db].vendor == 'postgresql':
+        backend = 'trigram'
+        # Индекс построен по UPPER(name): по нему же ищет icontains.
+        result = list(queryset.alias(
+            upper_name=Upper('name'),
+        ).annotate(
+            prefix=ExpressionWrapper(
+                Q(name__istartswith=term), output_field=BooleanField()
+            ),
+            contains=ExpressionWrapper(
+                Q(name__icontains=term), output_field=BooleanField()
+            ),
+            similarity=TrigramWordSimilarity(term, 'name'),
+        ).filter(
+            Q(name__icontains=term)
+            | Q(upper_name__trigram_word_similar=term.upper())
+        ).order_by('-prefix', '-contains', '-similarity', 'name')[:limit])
+    else:
+        backend = 'memory'
+        ids = index_holder.get().search(term, limit)
+        found = queryset.in_bulk(ids) if ids else {}
+        result = [found[pk] for pk in ids if pk in found]
+    SEARCH_DURATION.observe(time.perf_counter() - started, backend=backend)
+    return result
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_on_commit
+from core.jobs import enqueue
+from foodgram.constants import SIMILAR_RECIPES_DELAY
+from recipes.jobs import update_similar_recipes
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, StaleRecipeNeighbours, Tag)
+
+
+def mark_stale_on_commit(recipe_ids, using=None):
+    """Отмечает рецепты для пересчёта похожих после фиксации
+    транзакции и ставит пересчёт в очередь: изменения за
+    SIMILAR_RECIPES_DELAY секунд пересчитываются одной задачей."""
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+
+    def mark():
+        existing = Recipe.objects.using(using).filter(
+            pk__in=recipe_ids
+        ).values_list('pk', flat=True)
+        StaleRecipeNeighbours.objects.using(using).bulk_create(
+            [StaleRecipeNeighbours(recipe_id=pk) for pk in existing],
+            ignore_conflicts=True,
+        )
+        enqueue(
+            update_similar_recipes, delay=SIMILAR_RECIPES_DELAY,
+            dedup_key='similar-recipes', using=using,
+        )
+
+    transaction.on_commit(mark, using=using)
+
+
+def recipe_tags(recipe_id, author_id=None):
+    tags = [f'recipe:{recipe_id}', 'recipes']
+    if author_id is not None:
+        tags.append(f'user:{author_id}')
+    return tags
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, using, **kwargs):
+    invalidate_on_commit(
+        *recipe_tags(instance.pk, instance.author_id), using=using
+    )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredients(sender, instance, using, **kwargs):
+    invalidate_on_commit(*recipe_tags(instance.recipe_id), using=using)
+    mark_stale_on_commit([instance.recipe_id], using=using)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations(sender, instance, action, reverse, model,
+                                pk_set, using, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_on_commit(*recipe_tags(instance.pk), using=using)
+    elif pk_set:
+        invalidate_on_commit(
+            'recipes', *(f'recipe:{pk}' for pk in pk_set), using=using
+        )
+    else:
+        invalidate_on_commit('recipes', using=using)
+    if sender is Recipe.ingredients.through:
+        mark_stale_on_commit(
+            pk_set or () if reverse else [instance.pk], using=using
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag(sender, instance, using, **kwargs):
+    invalidate_on_commit('tags', 'recipes', using=using)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient(sender, instance, using, **kwargs):
+    invalidate_on_commit('ingredients', 'recipes', using=using)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_user_recipe(sender, instance, using, **kwargs):
+    invalidate_on_commit(
+        f'user:{instance.user_id}', f'recipe:{instance.recipe_id}',
+        using=using,
+    )
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from core.models import Job
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart)
+from recipes.purge import purge_deleted
+from users.models import Follow, User
+
+
+class SoftDeleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='secret',
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='secret',
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Омлет', text='Взбить и пожарить',
+            cooking_time=10, image='recipes/omelette.png',
+        )
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, amount=2,
+            ingredient=Ingredient.objects.create(
+                name='яйца', measurement_unit='шт'
+            ),
+        )
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipe)
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipe)
+        Follow.objects.create(user=cls.reader, following=cls.author)
+
+    def purge(self):
+        with mock.patch('recipes.purge.default_storage') as storage:
+            with self.captureOnCommitCallbacks(execute=True):
+                purged = purge_deleted()
+        return purged, [call.args[0] for call in storage.delete.mock_calls]
+
+    def test_deleted_recipe_is_hidden_until_purge(self):
+        self.recipe.delete()
+        self.assertFalse(Recipe.objects.filter(pk=self.recipe.pk).exists())
+        hidden = Recipe.all_objects.get(pk=self.recipe.pk)
+        self.assertIsNotNone(hidden.deleted_at)
+        self.assertTrue(Favorite.objects.filter(recipe=hidden).exists())
+        self.assertTrue(
+            Job.objects.filter(
+                task='recipes.jobs.purge_deleted', status=Job.QUEUED,
+                dedup_key='purge-deleted',
+            ).exists()
+        )
+
+    def test_purge_removes_recipe_rows_and_image(self):
+        self.recipe.delete()
+        purged, removed = self.purge()
+        self.assertEqual(purged, (1, 0))
+        self.assertEqual(removed, ['recipes/omelette.png'])
+        self.assertFalse(
+            Recipe.all_objects.filter(pk=self.recipe.pk).exists()
+        )
+        for model in (RecipeIngredient, Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(
+                    model.objects.filter(recipe_id=self.recipe.pk).exists()
+                )
+        self.assertEqual(Ingredient.objects.count(), 1)
+
+    def test_purge_keeps_visible_recipes(self):
+        self.assertEqual(self.purge(), ((0, 0), []))
+        self.assertTrue(Recipe.objects.filter(pk=self.recipe.pk).exists())
+
+    def test_deleted_user_is_hidden_with_recipes(self):
+        User.objects.filter(pk=self.author.pk).delete()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        hidden = User.all_objects.get(pk=self.author.pk)
+        self.assertFalse(hidden.is_active)
+        self.assertFalse(hidden.has_usable_password())
+        self.assertEqual(hidden.username, f'deleted-{hidden.pk}')
+        self.assertFalse(Recipe.objects.filter(author=hidden).exists())
+        # Почта и никнейм свободны для новой регистрации.
+        User.objects.create_user(
+            username='author', email='author@example.com', password='secret',
+        )
+
+    def test_purge_removes_user_after_recipes(self):
+        User.objects.filter(pk=self.author.pk).delete()
+        purged, removed = self.purge()
+        self.assertEqual(purged, (1, 1))
+        self.assertEqual(removed, ['recipes/omelette.png'])
+        self.assertFalse(
+            User.all_objects.filter(pk=self.author.pk).exists()
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(User.objects.filter(pk=self.reader.pk).exists())
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+INDEX_NAME = 'user_search_trgm'
+
+
+def create_trigram_index(apps, schema_editor):
+    """GIN-индекс pg_trgm для поиска пользователей (UserSearchFilter).
+
+    Выражения совпадают с UPPER(поле) LIKE, в который Django
+    превращает icontains. В других базах миграция ничего не делает.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('users', 'User')._meta.db_table
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        f'ON {schema_editor.quote_name(table)} USING gin ('
+        f'UPPER(username) gin_trgm_ops, '
+        f'UPPER(first_name) gin_trgm_ops, '
+        f'UPPER(last_name) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_user_first_name_alter_user_last_name_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,10 +1,65 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import models, router, transaction
 from django.db.models import CharField
+from django.utils import timezone
 
+from core.cache import invalidate_on_commit
+from core.jobs import enqueue
 from users.constants import MAX_LENGTH
 
 
+class UserQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Скрывает пользователей и их рецепты вместо удаления.
+
+        Пользователь сразу теряет вход, а почта и никнейм освобождаются
+        для новой регистрации; строки и зависимые записи удаляет
+        порциями задача purge_deleted (recipes.purge).
+        """
+        from recipes.models import Recipe
+
+        users = list(self.filter(deleted_at__isnull=True))
+        if not users:
+            return 0, {}
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            Recipe.all_objects.using(self.db).filter(
+                author__in=users
+            ).delete()
+            for user in users:
+                user.deleted_at = now
+                user.is_active = False
+                user.username = f'deleted-{user.pk}'
+                user.email = f'deleted-{user.pk}@deleted.invalid'
+                user.set_unusable_password()
+                # save(), а не update(): сигналы сбрасывают кэш входа.
+                user.save(using=self.db, update_fields=(
+                    'deleted_at', 'is_active', 'username', 'email',
+                    'password',
+                ))
+            invalidate_on_commit('users', using=self.db)
+            enqueue(
+                'recipes.jobs.purge_deleted', dedup_key='purge-deleted',
+                using=self.db,
+            )
+        return len(users), {self.model._meta.label: len(users)}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class ActiveUserManager(UserManager.from_queryset(UserQuerySet)):
+    """Пользователи без скрытых."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class AllUserManager(models.Manager.from_queryset(UserQuerySet)):
+    """Все пользователи, включая скрытые."""
+
+
 class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
@@ -47,14 +102,36 @@ class User(AbstractUser):
         null=True,
         verbose_name='Аватар'
     )
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Удалён'
+    )
+
+    objects = ActiveUserManager()
+    all_objects = AllUserManager()
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=('deleted_at',),
+                condition=models.Q(deleted_at__isnull=False),
+                name='user_deleted',
+            )
+        ]
         verbose_name = 'Пользователь'
         verbose_name_plural = 'пользователи'
 
     def __str__(self) -> CharField:
         return self.username
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(type(self), instance=self)
+        return type(self).all_objects.using(using).filter(
+            pk=self.pk
+        ).delete()
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import invalidate_on_commit
+from users.models import Follow, User
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, using, **kwargs):
+    invalidate_on_commit(
+        f'user:{instance.user_id}', f'user:{instance.following_id}',
+        using=using,
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, using, **kwargs):
+    tags = [f'user:{instance.pk}']
+    if kwargs.get('created', True):
+        # Новый или удалённый пользователь меняет число пользователей.
+        tags.append('users')
+    invalidate_on_commit(*tags, using=using)